@@ -41,6 +41,7 @@ INSTALLED_APPS = [
     # Custom apps
     'users.apps.UsersConfig',
     'fansite.apps.FansiteConfig',
+    'shows.apps.ShowsConfig',
 ]
 
 MIDDLEWARE = [
@@ -95,6 +96,24 @@ DATABASES = {
     }
 }
 
+# Cache
+# https://docs.djangoproject.com/en/4.1/topics/cache/
+
+# Cache must be shared by all processes (web workers, management commands), since cached pages are invalidated
+# by bumping versions stored in it. Filesystem cache by default, set CACHE_BACKEND and CACHE_LOCATION to use
+# another shared backend (ex. 'django.core.cache.backends.redis.RedisCache' and 'redis://127.0.0.1:6379').
+# Version keyed page and fragment caching is turned off if the local memory backend is used.
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': config('CACHE_LOCATION', default=str(BASE_DIR / 'cache')),
+        'TIMEOUT': config('CACHE_TIMEOUT', default=3600, cast=int),
+        'OPTIONS': {
+            'MAX_ENTRIES': config('CACHE_MAX_ENTRIES', default=10000, cast=int),
+        },
+    }
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/4.1/ref/settings/#auth-password-validators
 
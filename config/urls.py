@@ -17,10 +17,17 @@ from django.contrib import admin
 from django.urls import include, path
 from django.views.generic import RedirectView
 from fansite import views as fansite_views
+from shows import api as shows_api
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     #path('fansite/', include('fansite.urls')),
     path('', fansite_views.index, name='index'),
+    path('', include('shows.urls')),
+    # JSON API
+    path('api/shows/', shows_api.show_list, name='api-show-list'),
+    path('api/shows/<slug:slug>/', shows_api.show_detail, name='api-show-detail'),
+    path('api/episodes/', shows_api.episode_list, name='api-episode-list'),
+    path('api/episodes/<slug:slug>/', shows_api.episode_detail, name='api-episode-detail'),
     #path('', RedirectView.as_view(url='fansite/', permanent=True)),
 ]
@@ -1,3 +1,38 @@
+import datetime
+
 from django.test import TestCase
 
-# Create your tests here.
+from shows.models import Show, Episode
+from shows.testing import FileCacheTestMixin
+
+class IndexTests(FileCacheTestMixin, TestCase):
+    def get_content(self):
+        response = self.client.get('/')
+        self.assertEqual(response.status_code, 200)
+        return response.content.decode('utf-8')
+
+    def test_index_lists_shows_and_latest_episodes(self):
+        show = Show.objects.create(name='Game Club', slug='game-club')
+        Episode.objects.create(show=show, title='First Episode', slug='first-episode', published_at=datetime.datetime(2022, 3, 27, tzinfo=datetime.timezone.utc))
+        # Episodes without a publish date are NOT latest episodes
+        Episode.objects.create(show=show, title='Unpublished Episode', slug='unpublished-episode')
+
+        content = self.get_content()
+        self.assertIn('Game Club', content)
+        self.assertIn('First Episode', content)
+        self.assertNotIn('Unpublished Episode', content)
+
+    def test_cached_index_changes_after_objects_are_saved(self):
+        show = Show.objects.create(name='Game Club', slug='game-club')
+        self.assertIn('Game Club', self.get_content())
+
+        # Update without signals does NOT bump versions, so cached page is still used
+        Show.objects.filter(pk=show.pk).update(name='Changed Without Signals')
+        self.assertIn('Game Club', self.get_content())
+
+        show.name = 'Renamed Show'
+        show.save()
+        self.assertIn('Renamed Show', self.get_content())
+
+        Episode.objects.create(show=show, title='New Episode', slug='new-episode', published_at=datetime.datetime(2022, 3, 28, tzinfo=datetime.timezone.utc))
+        self.assertIn('New Episode', self.get_content())
@@ -1,6 +1,26 @@
+import asyncio
+
 from django.shortcuts import render
 
+from shows.cache import cache_page_by_version
+from shows.models import Show, Episode
+from shows.utils import alist
+
 # Create your views here.
 
-def index(request):
-    return render(request, 'fansite/index.html')
\ No newline at end of file
+# Number of latest episodes on index page
+LATEST_EPISODES_COUNT = 10
+
+@cache_page_by_version(('shows',))
+async def index(request):
+    # Shows and latest episodes are independent, so they are gathered to run concurrently once the ORM is natively async
+    # (Django 4.1 runs async queries one after another in a single thread)
+    shows, (latest_episodes, _) = await asyncio.gather(
+        alist(Show.objects.select_related('statistics')),
+        Episode.objects.select_related('show').akeyset_page(page_size=LATEST_EPISODES_COUNT),
+    )
+
+    return render(request, 'fansite/index.html', {
+        'shows': shows,
+        'latest_episodes': latest_episodes,
+    })
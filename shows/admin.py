@@ -1,3 +1,50 @@
 from django.contrib import admin
 
 # Register your models here.
+
+from .models import Show, Person, YouTubeVideo, ExternalLink, Episode, ShowStatistics
+
+@admin.register(Episode)
+class EpisodeAdmin(admin.ModelAdmin):
+    list_display = ('title', 'show', 'host', 'display_featuring', 'youtube_video')
+    list_filter = ('show',)
+    list_select_related = ('show', 'host', 'youtube_video')
+    search_fields = ('title',)
+    raw_id_fields = ('youtube_video',)
+    filter_horizontal = ('featuring', 'external_links')
+
+    def get_queryset(self, request):
+        # Names of people featured are aggregated in the changelist query instead of a query per row
+        return super().get_queryset(request).with_featuring_names()
+
+@admin.register(Show)
+class ShowAdmin(admin.ModelAdmin):
+    list_display = ('name', 'slug', 'display_episode_count', 'display_total_views', 'display_updated_at')
+    # Statistics are read from stored row of each show instead of aggregating episodes
+    list_select_related = ('statistics',)
+    prepopulated_fields = {'slug': ('name',)}
+
+    @admin.display(description='Episodes')
+    def display_episode_count(self, show):
+        return ShowStatistics.get_for_show(show).episode_count
+
+    @admin.display(description='Total Views')
+    def display_total_views(self, show):
+        return ShowStatistics.get_for_show(show).total_views
+
+    @admin.display(description='Statistics Updated')
+    def display_updated_at(self, show):
+        return ShowStatistics.get_for_show(show).updated_at
+
+@admin.register(Person)
+class PersonAdmin(admin.ModelAdmin):
+    list_display = ('name', 'slug')
+    prepopulated_fields = {'slug': ('name',)}
+    search_fields = ('name',)
+
+@admin.register(YouTubeVideo)
+class YouTubeVideoAdmin(admin.ModelAdmin):
+    list_display = ('title', 'video_id', 'published_at')
+    search_fields = ('title', 'video_id')
+
+admin.site.register(ExternalLink)
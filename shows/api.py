@@ -0,0 +1,284 @@
+import hashlib
+
+from django.contrib.postgres.expressions import ArraySubquery
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.http import JsonResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from .models import Show, Person, Episode, EpisodeQuerySet, ShowStatistics
+
+# Read-only JSON API of shows and episodes
+# Rows are selected with values_list() and returned as dicts, so models are never instantiated.
+# Responses have ETag and Last-Modified headers from the newest update of the rows, and
+# conditional requests that match are answered with 304 Not Modified before any rows are selected.
+
+# Fields that can be requested with the 'fields' parameter, with the lookup or expression used for each
+SHOW_FIELDS = {
+    'id': 'pk',
+    'name': 'name',
+    'slug': 'slug',
+    'description': 'description',
+    'episode_count': 'statistics__episode_count',
+    'total_views': 'statistics__total_views',
+    'updated_at': 'updated_at',
+}
+EPISODE_FIELDS = {
+    'id': 'pk',
+    'title': 'title',
+    'slug': 'slug',
+    'show': 'show__slug',
+    'published_at': 'published_at',
+    'video_id': 'youtube_video__video_id',
+    'featuring': ArraySubquery(
+        Person.objects.filter(shows_episodes_featuring=models.OuterRef('pk')).order_by('name').values('name')
+    ),
+    'headings': 'headings',
+    'updated_at': 'updated_at',
+}
+
+# Fields returned if 'fields' parameter is NOT given (large fields like 'description' and 'headings' must be requested)
+SHOW_DEFAULT_FIELDS = ('id', 'name', 'slug', 'episode_count')
+EPISODE_DEFAULT_FIELDS = ('id', 'title', 'slug', 'show', 'published_at', 'video_id')
+
+# Number of rows in each page if 'limit' parameter is NOT given, and max allowed
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+def get_fields(request, allowed_fields, default_fields):
+    '''
+    Returns fields requested with 'fields' parameter (ex. '?fields=id,title').
+
+    Parameters:
+        request (HttpRequest): Request of API
+        allowed_fields (dict): Lookup or expression keyed by field name
+        default_fields (tuple): Fields returned if parameter is NOT given
+
+    Returns:
+        tuple|JsonResponse: Field names, or error response if a field is NOT allowed
+    '''
+    if not request.GET.get('fields'):
+        return default_fields
+
+    fields = tuple(dict.fromkeys(field.strip() for field in request.GET['fields'].split(',') if field.strip()))
+    unknown_fields = [field for field in fields if field not in allowed_fields]
+    if unknown_fields or not fields:
+        return error_response(f'Unknown fields: {", ".join(unknown_fields)}. Allowed fields: {", ".join(allowed_fields)}')
+    return fields
+
+def get_page_size(request):
+    '''
+    Returns page size requested with 'limit' parameter.
+
+    Parameters:
+        request (HttpRequest): Request of API
+
+    Returns:
+        int|JsonResponse: Page size, or error response if limit is invalid
+    '''
+    try:
+        page_size = int(request.GET.get('limit', DEFAULT_PAGE_SIZE))
+    except ValueError:
+        page_size = 0
+    if not 1 <= page_size <= MAX_PAGE_SIZE:
+        return error_response(f'Limit must be a number from 1 to {MAX_PAGE_SIZE}.')
+    return page_size
+
+def select_values(queryset, fields, allowed_fields, extra_lookups = ()):
+    '''
+    Returns queryset selecting only requested fields as tuples, with extra lookups at the end.
+
+    Parameters:
+        queryset (QuerySet): Rows to select
+        fields (tuple): Requested field names
+        allowed_fields (dict): Lookup or expression keyed by field name
+        extra_lookups (tuple): Lookups used for pagination (NOT returned to client)
+
+    Returns:
+        QuerySet: Tuples of values
+    '''
+    # Expressions are annotated with a prefix, since annotations can NOT have the same name as a model field
+    expressions = {f'api_{field}': allowed_fields[field] for field in fields if not isinstance(allowed_fields[field], str)}
+    if expressions:
+        queryset = queryset.annotate(**expressions)
+    lookups = [allowed_fields[field] if isinstance(allowed_fields[field], str) else f'api_{field}' for field in fields]
+    return queryset.values_list(*lookups, *extra_lookups)
+
+async def conditional_response(request, queryset, *extra_querysets):
+    '''
+    Returns 304 response if rows did NOT change since the client's copy, else the headers for the new response.
+    Newest update and number of rows are requested in one aggregate query per queryset, so deleted rows also change the ETag.
+
+    Parameters:
+        request (HttpRequest): Request of API
+        queryset (QuerySet): Rows of response (with 'updated_at' field)
+        extra_querysets: Other rows the response includes (ex. statistics of shows)
+
+    Returns:
+        tuple: (<not_modified_response(HttpResponse|None)>, <headers(dict)>)
+    '''
+    last_modified = None
+    versions = []
+    for rows in (queryset, *extra_querysets):
+        # Ordering is NOT needed for aggregate and would prevent using the updated_at index
+        state = await rows.order_by().aaggregate(newest=models.Max('updated_at'), count=models.Count('pk'))
+        versions.append(f'{state["newest"].isoformat() if state["newest"] else ""}:{state["count"]}')
+        if state['newest'] is not None and (last_modified is None or state['newest'] > last_modified):
+            last_modified = state['newest']
+
+    # Same rows with different parameters (ex. fields, cursor) have different content
+    etag = quote_etag(hashlib.sha256(f'{request.get_full_path()}|{"|".join(versions)}'.encode('utf-8')).hexdigest())
+    last_modified = int(last_modified.timestamp()) if last_modified is not None else None
+
+    headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+    if last_modified is not None:
+        headers['Last-Modified'] = http_date(last_modified)
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        for header, value in headers.items():
+            response.headers[header] = value
+    return response, headers
+
+def json_response(data, headers):
+    '''
+    Returns JSON response with headers.
+
+    Parameters:
+        data (dict): JSON serializable data (dates are converted to ISO 8601)
+        headers (dict): Headers of response
+
+    Returns:
+        JsonResponse: Response
+    '''
+    response = JsonResponse(data, encoder=DjangoJSONEncoder)
+    for header, value in headers.items():
+        response.headers[header] = value
+    return response
+
+def error_response(message, status = 400):
+    '''
+    Returns JSON error response.
+
+    Parameters:
+        message (str): Error message
+        status (int): HTTP status code
+
+    Returns:
+        JsonResponse: Response
+    '''
+    return JsonResponse({'error': message}, status=status)
+
+async def show_list(request):
+    '''
+    Returns page of shows sorted by ID.
+
+    Parameters (query string):
+        fields: Comma separated fields (see SHOW_FIELDS)
+        limit: Number of shows in page
+        cursor: 'next_cursor' from the previous page
+    '''
+    fields = get_fields(request, SHOW_FIELDS, SHOW_DEFAULT_FIELDS)
+    page_size = get_page_size(request)
+    for value in (fields, page_size):
+        if isinstance(value, JsonResponse):
+            return value
+
+    shows = Show.objects.order_by('pk')
+    if request.GET.get('cursor'):
+        if not request.GET['cursor'].isdigit():
+            return error_response('Invalid cursor.')
+        shows = shows.filter(pk__gt=int(request.GET['cursor']))
+
+    response, headers = await conditional_response(request, Show.objects.all(), ShowStatistics.objects.all())
+    if response is not None:
+        return response
+
+    # Request one extra show to know if there is a next page
+    rows = [row async for row in select_values(shows, fields, SHOW_FIELDS, ('pk',))[:page_size + 1]]
+    next_cursor = str(rows[page_size - 1][-1]) if len(rows) > page_size else None
+    return json_response({
+        'results': [dict(zip(fields, row)) for row in rows[:page_size]],
+        'next_cursor': next_cursor,
+    }, headers)
+
+async def show_detail(request, slug):
+    '''
+    Returns show.
+
+    Parameters (query string):
+        fields: Comma separated fields (see SHOW_FIELDS)
+    '''
+    fields = get_fields(request, SHOW_FIELDS, SHOW_DEFAULT_FIELDS)
+    if isinstance(fields, JsonResponse):
+        return fields
+
+    show = Show.objects.filter(slug=slug)
+    response, headers = await conditional_response(request, show, ShowStatistics.objects.filter(show__slug=slug))
+    if response is not None:
+        return response
+
+    row = await select_values(show, fields, SHOW_FIELDS).afirst()
+    if row is None:
+        return error_response('Show does not exist.', 404)
+    return json_response(dict(zip(fields, row)), headers)
+
+async def episode_list(request):
+    '''
+    Returns page of episodes sorted by publish date (episodes without a publish date are NOT included).
+
+    Parameters (query string):
+        fields: Comma separated fields (see EPISODE_FIELDS)
+        show: Only episodes of show with slug
+        order: 'newest' (default) or 'oldest'
+        limit: Number of episodes in page
+        cursor: 'next_cursor' from the previous page
+    '''
+    fields = get_fields(request, EPISODE_FIELDS, EPISODE_DEFAULT_FIELDS)
+    page_size = get_page_size(request)
+    for value in (fields, page_size):
+        if isinstance(value, JsonResponse):
+            return value
+
+    episodes = Episode.objects.all()
+    if request.GET.get('show'):
+        episodes = episodes.filter(show__slug=request.GET['show'])
+
+    newest_first = request.GET.get('order', 'newest') != 'oldest'
+    try:
+        page = episodes.keyset_filter(request.GET.get('cursor'), page_size, newest_first)
+    except ValueError:
+        return error_response('Invalid cursor.')
+
+    response, headers = await conditional_response(request, episodes)
+    if response is not None:
+        return response
+
+    rows = [row async for row in select_values(page, fields, EPISODE_FIELDS, ('published_at', 'pk'))]
+    next_cursor = EpisodeQuerySet.encode_cursor(*rows[page_size - 1][-2:]) if len(rows) > page_size else None
+    return json_response({
+        'results': [dict(zip(fields, row)) for row in rows[:page_size]],
+        'next_cursor': next_cursor,
+    }, headers)
+
+async def episode_detail(request, slug):
+    '''
+    Returns episode.
+
+    Parameters (query string):
+        fields: Comma separated fields (see EPISODE_FIELDS)
+    '''
+    fields = get_fields(request, EPISODE_FIELDS, EPISODE_DEFAULT_FIELDS)
+    if isinstance(fields, JsonResponse):
+        return fields
+
+    episode = Episode.objects.filter(slug=slug)
+    response, headers = await conditional_response(request, episode)
+    if response is not None:
+        return response
+
+    row = await select_values(episode, fields, EPISODE_FIELDS).afirst()
+    if row is None:
+        return error_response('Episode does not exist.', 404)
+    return json_response(dict(zip(fields, row)), headers)
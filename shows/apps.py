@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class ShowsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'shows'
+
+    def ready(self):
+        # Connect signal receivers
+        from . import signals
+
+        # Warn if cache backend can NOT be used for version keyed caching
+        from django.core import checks
+        from .cache import check_cache_backend
+        checks.register(check_cache_backend)
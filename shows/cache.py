@@ -0,0 +1,211 @@
+import asyncio
+import functools
+import hashlib
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core import checks
+from django.core.cache import cache
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+
+# Cached pages and fragments are keyed by versions of the objects they show, instead of being deleted when objects change.
+# A version is bumped by signal receivers when its object changes, so old entries are never read again and expire on their own.
+# Version names:
+#   ('shows',) - Any show, episode, person or YouTube video (used by pages listing many objects)
+#   ('show', <pk>) - Show, including its statistics
+#   ('episode', <pk>) - Episode, including its people featured, external links and YouTube video
+
+# Backends that keep entries per process, so versions bumped by other processes (ex. import command) are never seen
+PROCESS_LOCAL_BACKENDS = ('django.core.cache.backends.locmem.LocMemCache',)
+
+def is_version_caching_enabled():
+    '''
+    Returns whether pages and fragments are cached, which is only safe if cache is shared by all processes.
+
+    Returns:
+        bool: True if cache backend is NOT local memory
+    '''
+    return settings.CACHES['default']['BACKEND'] not in PROCESS_LOCAL_BACKENDS
+
+def get_fragment_timeout():
+    '''
+    Returns seconds template fragments are cached, used as timeout of {% cache %} tags.
+
+    Returns:
+        int: Default timeout of cache, or 0 (NOT cached) if version caching is NOT enabled
+    '''
+    return settings.CACHES['default'].get('TIMEOUT', 300) if is_version_caching_enabled() else 0
+
+def check_cache_backend(app_configs, **kwargs):
+    '''System check warning that pages are NOT cached if cache backend is local memory.'''
+    if is_version_caching_enabled():
+        return []
+    return [checks.Warning(
+        'Cache backend is local memory, so versions bumped by other processes are NOT seen and pages and fragments are NOT cached.',
+        hint='Set CACHE_BACKEND to a cache shared by all processes (ex. filesystem, Redis, database).',
+        id='shows.W001',
+    )]
+
+def make_version_key(version_name):
+    '''
+    Returns cache key of version.
+
+    Parameters:
+        version_name (tuple): Version name (ex. ('shows',), ('episode', 12))
+
+    Returns:
+        str: Cache key
+    '''
+    return 'version:' + ':'.join(str(part) for part in version_name)
+
+def get_versions(version_names):
+    '''
+    Returns current versions in a single cache request, adding versions that are NOT cached yet.
+
+    Parameters:
+        version_names (iterable): Version names (ex. [('shows',), ('episode', 12)])
+
+    Returns:
+        dict: Version (int) keyed by version name
+    '''
+    keys = {make_version_key(version_name): version_name for version_name in version_names}
+    versions = cache.get_many(keys)
+
+    # Versions that were never bumped or were evicted start at current time, so they never match an older version
+    missing_versions = {key: time.time_ns() for key in keys if key not in versions}
+    if missing_versions:
+        cache.set_many(missing_versions, timeout=None)
+        versions.update(missing_versions)
+
+    return {version_name: versions[key] for key, version_name in keys.items()}
+
+async def aget_versions(version_names):
+    '''
+    Async version of get_versions().
+
+    Parameters:
+        version_names (iterable): Version names (ex. [('shows',), ('episode', 12)])
+
+    Returns:
+        dict: Version (int) keyed by version name
+    '''
+    keys = {make_version_key(version_name): version_name for version_name in version_names}
+    versions = await cache.aget_many(keys)
+
+    missing_versions = {key: time.time_ns() for key in keys if key not in versions}
+    if missing_versions:
+        await cache.aset_many(missing_versions, timeout=None)
+        versions.update(missing_versions)
+
+    return {version_name: versions[key] for key, version_name in keys.items()}
+
+def get_version(*version_name):
+    '''
+    Returns current version.
+
+    Parameters:
+        version_name: Parts of version name (ex. 'episode', 12)
+
+    Returns:
+        int: Version
+    '''
+    return get_versions([version_name])[version_name]
+
+def bump_versions(version_names):
+    '''
+    Changes versions so cached pages and fragments using them are NOT used again.
+
+    Parameters:
+        version_names (iterable): Version names (ex. [('shows',), ('episode', 12)]), names with a pk of None are ignored
+    '''
+    version = time.time_ns()
+    cache.set_many(
+        {make_version_key(version_name): version for version_name in version_names if None not in version_name},
+        timeout=None
+    )
+
+def cache_page_by_version(*version_names, timeout = DEFAULT_TIMEOUT):
+    '''
+    Decorator that caches successful responses of view (sync or async) by URL and current versions, for anonymous GET requests.
+    Responses are NOT cached if version caching is NOT enabled (see is_version_caching_enabled()).
+    Cached responses are returned without calling the view, so they do NOT touch the database or template engine.
+
+    Parameters:
+        version_names: Version names the page depends on (ex. cache_page_by_version(('shows',)))
+        timeout (int|None): Seconds response is cached (default timeout of cache if NOT given, never expires if None)
+
+    Returns:
+        function: Decorator
+    '''
+    def decorator(view):
+        if asyncio.iscoroutinefunction(view):
+            @functools.wraps(view)
+            async def async_wrapper(request, *args, **kwargs):
+                if not is_version_caching_enabled():
+                    return await view(request, *args, **kwargs)
+                # Session of user is loaded from database in a thread, since it is NOT allowed in async context
+                if request.method not in ('GET', 'HEAD') or await sync_to_async(is_authenticated)(request):
+                    return await view(request, *args, **kwargs)
+
+                key = make_page_key(request, await aget_versions(version_names))
+                response = await cache.aget(key)
+                if response is None:
+                    response = await view(request, *args, **kwargs)
+                    if is_cacheable(response):
+                        await cache.aset(key, response, timeout)
+                return response
+            return async_wrapper
+
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if not is_version_caching_enabled() or request.method not in ('GET', 'HEAD') or is_authenticated(request):
+                return view(request, *args, **kwargs)
+
+            key = make_page_key(request, get_versions(version_names))
+            response = cache.get(key)
+            if response is None:
+                response = view(request, *args, **kwargs)
+                if is_cacheable(response):
+                    cache.set(key, response, timeout)
+            return response
+        return wrapper
+    return decorator
+
+def is_authenticated(request):
+    '''
+    Returns whether user of request is signed in (pages of signed in users may include content only for them).
+
+    Parameters:
+        request (HttpRequest): Request of page
+
+    Returns:
+        bool: True if user is signed in
+    '''
+    return request.user.is_authenticated
+
+def is_cacheable(response):
+    '''
+    Returns whether response can be cached for all anonymous users.
+
+    Parameters:
+        response (HttpResponse): Response of view
+
+    Returns:
+        bool: True if response is successful, NOT streaming and does NOT set cookies (ex. session, CSRF token)
+    '''
+    return response.status_code == 200 and not response.streaming and not response.cookies
+
+def make_page_key(request, versions):
+    '''
+    Returns cache key of page from its full URL and versions.
+
+    Parameters:
+        request (HttpRequest): Request of page
+        versions (dict): Versions the page depends on keyed by version name
+
+    Returns:
+        str: Cache key
+    '''
+    versions_text = ','.join(f'{make_version_key(version_name)}={version}' for version_name, version in sorted(versions.items()))
+    return 'page:' + hashlib.sha256(f'{request.build_absolute_uri()}|{versions_text}'.encode('utf-8')).hexdigest()
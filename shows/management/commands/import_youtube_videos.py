@@ -0,0 +1,231 @@
+from itertools import islice
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.text import slugify
+
+from shows.cache import bump_versions
+from shows.models import Show, Person, YouTubeVideo, ExternalLink, Episode, ShowStatistics
+from utilities.json_lines import read_json_lines
+from utilities.video_store import VideoStore
+
+class Command(BaseCommand):
+    help = 'Imports classified YouTube video data into shows, YouTube videos and episodes, in batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--store', default='utilities/minn_max_videos.sqlite3', help='Path of video store SQLite file (default source).')
+        parser.add_argument('--json-lines', dest='json_lines', help='Path of newline-delimited JSON file to import instead of video store. Each record is video data from YouTube Data API with optional keys "show", "featuring" (list of names) and "external_links" (list of URL\'s or dicts with "title" and "url").')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Number of videos written per batch.')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            self.stderr.write('Batch size must be at least 1.')
+            return
+
+        if options['json_lines']:
+            video_store = None
+            records = read_json_lines(options['json_lines'])
+        else:
+            video_store = VideoStore(options['store'])
+            records = self.iterate_video_store_records(video_store)
+
+        # Show ID's keyed by show title, kept across batches so each show is only written once
+        show_ids = {}
+        count = 0
+        try:
+            records = iter(records)
+            while True:
+                batch = list(islice(records, batch_size))
+                if not batch:
+                    break
+                with transaction.atomic():
+                    self.import_batch(batch, show_ids)
+                count += len(batch)
+                if options['verbosity'] > 1:
+                    self.stdout.write(f'Imported: {count}')
+        finally:
+            if video_store is not None:
+                video_store.close()
+
+        self.stdout.write(self.style.SUCCESS(f'Videos Imported: {count}, Shows: {len(show_ids)}'))
+
+    @staticmethod
+    def iterate_video_store_records(video_store):
+        '''
+        Yields classified video data from video store, oldest first.
+
+        Parameters:
+            video_store (VideoStore): Store of collected video data
+
+        Yields:
+            dict: Video data from YouTube Data API with key 'show' added
+        '''
+        for video in video_store.get_videos(('show', 'data'), newest_first=False):
+            record = video['data']
+            record['show'] = video['show']
+            yield record
+
+    def import_batch(self, records, show_ids):
+        '''
+        Upserts shows, YouTube videos and episodes of batch, then inserts featuring and external link rows of episodes and refreshes statistics of their shows.
+        Update date of existing shows and episodes only changes if their data changed, so conditional requests of JSON API still match after an import.
+        Number of queries is the same for any batch size.
+
+        Parameters:
+            records (list): Video data from YouTube Data API with optional keys 'show', 'featuring' and 'external_links'
+            show_ids (dict): Show ID keyed by show title, updated with shows of batch
+        '''
+        # Videos with the same video ID in one batch would conflict with each other, so only the last is kept
+        records = list({record['id']: record for record in records}.values())
+
+        # Shows (videos that do NOT match any show are imported without a show)
+        show_titles = {record.get('show') for record in records} - set(show_ids) - {None, 'Other'}
+        if show_titles:
+            shows = Show.objects.filter(slug__in=[slugify(show_title) for show_title in show_titles])
+            previous_show_names = dict(shows.values_list('slug', 'name'))
+            Show.objects.bulk_create(
+                [Show(name=show_title, slug=slugify(show_title)) for show_title in show_titles],
+                update_conflicts=True,
+                unique_fields=['slug'],
+                update_fields=['name']
+            )
+            changed_show_slugs = [
+                slugify(show_title) for show_title in show_titles
+                if slugify(show_title) in previous_show_names and previous_show_names[slugify(show_title)] != show_title
+            ]
+            if changed_show_slugs:
+                Show.objects.filter(slug__in=changed_show_slugs).update(updated_at=timezone.now())
+            show_ids_by_slug = dict(shows.values_list('slug', 'id'))
+            for show_title in show_titles:
+                show_ids[show_title] = show_ids_by_slug[slugify(show_title)]
+
+        # YouTube videos (bulk_create does NOT set primary keys of updated rows, so they are queried after)
+        youtube_videos = {record['id']: self.build_youtube_video(record) for record in records}
+        YouTubeVideo.objects.bulk_create(
+            youtube_videos.values(),
+            update_conflicts=True,
+            unique_fields=['video_id'],
+            update_fields=['title', 'description', 'published_at', 'thumbnails', 'statistics']
+        )
+        youtube_video_ids = dict(YouTubeVideo.objects.filter(video_id__in=[record['id'] for record in records]).values_list('video_id', 'id'))
+
+        # Existing episodes, to find which changed (shows of existing episodes are also refreshed, since their statistics change if episodes moved to another show)
+        tracked_fields = ['show_id', 'title', 'published_at']
+        previous_episodes = {
+            row[0]: row[1:]
+            for row in Episode.objects.filter(youtube_video_id__in=youtube_video_ids.values()).values_list('youtube_video_id', 'id', *tracked_fields)
+        }
+        previous_show_ids = {show_id for _, show_id, _, _ in previous_episodes.values()}
+
+        # Episodes (slug is only set when episode is created, so existing URL's do NOT change)
+        episodes = [
+            Episode(
+                show_id=show_ids.get(record.get('show')),
+                title=record['snippet']['title'][:100],
+                youtube_video_id=youtube_video_ids[record['id']],
+                published_at=youtube_videos[record['id']].published_at,
+                slug=self.build_episode_slug(record['snippet']['title'], record['id']),
+            )
+            for record in records
+        ]
+        Episode.objects.bulk_create(
+            episodes,
+            update_conflicts=True,
+            unique_fields=['youtube_video_id'],
+            update_fields=tracked_fields
+        )
+        episode_ids = dict(Episode.objects.filter(youtube_video_id__in=youtube_video_ids.values()).values_list('youtube_video_id', 'id'))
+        changed_episode_ids = {
+            previous_episodes[episode.youtube_video_id][0] for episode in episodes
+            if episode.youtube_video_id in previous_episodes
+            and previous_episodes[episode.youtube_video_id][1:] != tuple(getattr(episode, field) for field in tracked_fields)
+        }
+
+        # Featuring and external links
+        featuring = {}
+        external_links = {}
+        for record in records:
+            episode_id = episode_ids[youtube_video_ids[record['id']]]
+            for name in record.get('featuring') or []:
+                featuring[(episode_id, slugify(name))] = name
+            for link in record.get('external_links') or []:
+                link = link if isinstance(link, dict) else {'url': link}
+                external_links[(episode_id, link['url'])] = link.get('title', '')
+
+        if featuring:
+            # People featured are included in episodes of JSON API, so existing episodes with new people featured changed
+            existing_episode_ids = {episode_id for episode_id, _, _, _ in previous_episodes.values()}
+            previous_featuring = set(
+                Episode.featuring.through.objects.filter(episode_id__in=existing_episode_ids).values_list('episode_id', 'person__slug')
+            )
+            changed_episode_ids.update(
+                episode_id for episode_id, slug in featuring
+                if episode_id in existing_episode_ids and (episode_id, slug) not in previous_featuring
+            )
+            Person.objects.bulk_create(
+                [Person(name=name, slug=slug) for (_, slug), name in featuring.items()],
+                ignore_conflicts=True
+            )
+            person_ids = dict(Person.objects.filter(slug__in={slug for _, slug in featuring}).values_list('slug', 'id'))
+            Episode.featuring.through.objects.bulk_create(
+                [Episode.featuring.through(episode_id=episode_id, person_id=person_ids[slug]) for episode_id, slug in featuring],
+                ignore_conflicts=True
+            )
+
+        if external_links:
+            ExternalLink.objects.bulk_create(
+                [ExternalLink(title=title[:100], url=url) for (_, url), title in external_links.items()],
+                ignore_conflicts=True
+            )
+            external_link_ids = dict(ExternalLink.objects.filter(url__in={url for _, url in external_links}).values_list('url', 'id'))
+            Episode.external_links.through.objects.bulk_create(
+                [Episode.external_links.through(episode_id=episode_id, externallink_id=external_link_ids[url]) for episode_id, url in external_links],
+                ignore_conflicts=True
+            )
+
+        if changed_episode_ids:
+            Episode.objects.filter(pk__in=changed_episode_ids).update(updated_at=timezone.now())
+
+        # Search vector, show statistics and cache versions are NOT updated by signals, since bulk_create does NOT send them
+        Episode.objects.filter(pk__in=episode_ids.values()).update_search_vector()
+        ShowStatistics.refresh(previous_show_ids | {show_ids.get(record.get('show')) for record in records})
+        bump_versions([('shows',)] + [('episode', episode_id) for episode_id in episode_ids.values()])
+
+    @staticmethod
+    def build_youtube_video(record):
+        '''
+        Returns unsaved YouTubeVideo from video data.
+
+        Parameters:
+            record (dict): Video data from YouTube Data API
+
+        Returns:
+            YouTubeVideo: Unsaved YouTube video
+        '''
+        snippet = record.get('snippet', {})
+        return YouTubeVideo(
+            video_id=record['id'],
+            title=snippet.get('title', '')[:100],
+            description=snippet.get('description', ''),
+            published_at=parse_datetime(snippet['publishedAt']) if snippet.get('publishedAt') else None,
+            thumbnails=snippet.get('thumbnails'),
+            statistics=record.get('statistics'),
+        )
+
+    @staticmethod
+    def build_episode_slug(title, video_id):
+        '''
+        Returns unique slug of episode from title and YouTube video ID (ex. 'revolution-x-replay-nSFdetbQ18M').
+
+        Parameters:
+            title (str): Title of YouTube video
+            video_id (str): YouTube video ID
+
+        Returns:
+            str: Slug of episode
+        '''
+        title_slug = slugify(title)[:100 - len(video_id) - 1].strip('-')
+        return f'{title_slug}-{video_id}' if title_slug else video_id
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from shows.models import Show, ShowStatistics
+
+class Command(BaseCommand):
+    help = 'Recomputes stored statistics of shows (all shows if no slugs are given).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('slugs', nargs='*', help='Slugs of shows to refresh.')
+
+    def handle(self, *args, **options):
+        show_ids = None
+        if options['slugs']:
+            show_ids = list(Show.objects.filter(slug__in=options['slugs']).values_list('pk', flat=True))
+
+        count = ShowStatistics.refresh(show_ids)
+        self.stdout.write(self.style.SUCCESS(f'Shows Refreshed: {count}'))
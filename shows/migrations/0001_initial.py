@@ -0,0 +1,82 @@
+# Generated by Django 4.1 on 2026-10-17 21:44
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExternalLink',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(blank=True, help_text='Enter title of the link.', max_length=100)),
+                ('url', models.URLField(help_text='Enter URL of the link.', max_length=500, unique=True, verbose_name='URL')),
+            ],
+            options={
+                'verbose_name': 'External Link',
+            },
+        ),
+        migrations.CreateModel(
+            name='Person',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(help_text='Enter name of the person.', max_length=100)),
+                ('slug', models.SlugField(help_text='Enter a url-safe, unique, lower-case version of the person.', max_length=100, unique=True)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Show',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(help_text='Enter name of the show.', max_length=100)),
+                ('description', models.TextField(blank=True, help_text='Enter description of the show.')),
+                ('slug', models.SlugField(help_text='Enter a url-safe, unique, lower-case version of the show.', max_length=100, unique=True)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='YouTubeVideo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('video_id', models.CharField(help_text='Enter ID of the YouTube video.', max_length=20, unique=True, verbose_name='Video ID')),
+                ('title', models.CharField(help_text='Enter title of the YouTube video.', max_length=100)),
+                ('description', models.TextField(blank=True, help_text='Enter description of the YouTube video.')),
+                ('published_at', models.DateTimeField(blank=True, help_text='Enter date and time the YouTube video was published.', null=True)),
+                ('thumbnails', models.JSONField(blank=True, help_text='Enter JSON of thumbnails from YouTube Data API.', null=True)),
+                ('statistics', models.JSONField(blank=True, help_text='Enter JSON of statistics (views, likes, comments) from YouTube Data API.', null=True)),
+            ],
+            options={
+                'verbose_name': 'YouTube Video',
+            },
+        ),
+        migrations.CreateModel(
+            name='Episode',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(help_text='Enter title of the episode.', max_length=100)),
+                ('headings', models.JSONField(blank=True, help_text='Enter JSON of different headings with key being the heading title and value being the content.', null=True)),
+                ('slug', models.SlugField(help_text='Enter a url-safe, unique, lower-case version of the episode.', max_length=100, unique=True)),
+                ('external_links', models.ManyToManyField(blank=True, help_text='Enter any external URL links (NOT including YouTube video).', to='shows.externallink', verbose_name='External Links')),
+                ('featuring', models.ManyToManyField(blank=True, help_text='Enter people who feature in the episode (NOT including the host).', related_name='%(app_label)s_%(class)s_featuring_related', related_query_name='%(app_label)s_%(class)ss_featuring', to='shows.person')),
+                ('host', models.ForeignKey(blank=True, help_text='Enter person who hosts the episode.', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(app_label)s_%(class)s_host_related', related_query_name='%(app_label)s_%(class)ss_host', to='shows.person')),
+                ('show', models.ForeignKey(blank=True, help_text='Enter show that includes the episode.', null=True, on_delete=django.db.models.deletion.SET_NULL, to='shows.show')),
+                ('youtube_video', models.ForeignKey(blank=True, help_text='Enter YouTube video of the episode.', null=True, on_delete=django.db.models.deletion.SET_NULL, to='shows.youtubevideo')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='episode',
+            constraint=models.UniqueConstraint(fields=('youtube_video',), name='unique_episode_youtube_video'),
+        ),
+    ]
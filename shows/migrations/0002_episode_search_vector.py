@@ -0,0 +1,43 @@
+# Generated by Django 4.1 on 2026-10-17 21:48
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shows', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='episode',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, help_text='Weighted full text search vector of title, headings, show and people featured (updated automatically).', null=True),
+        ),
+        # Populate search vector of existing episodes (same as EpisodeQuerySet.update_search_vector())
+        migrations.RunSQL(
+            sql='''
+                UPDATE shows_episode SET search_vector =
+                    setweight(to_tsvector('english'::regconfig, COALESCE(shows_episode.title, '')), 'A')
+                    || setweight(to_tsvector('english'::regconfig, COALESCE((
+                        SELECT string_agg(value, ' ') FROM jsonb_each_text(CASE WHEN jsonb_typeof(shows_episode.headings) = 'object' THEN shows_episode.headings ELSE '{}'::jsonb END)
+                    ), '')), 'B')
+                    || setweight(to_tsvector('english'::regconfig, COALESCE((
+                        SELECT shows_show.name FROM shows_show WHERE shows_show.id = shows_episode.show_id
+                    ), '')), 'C')
+                    || setweight(to_tsvector('english'::regconfig, COALESCE((
+                        SELECT string_agg(shows_person.name, ' ') FROM shows_episode_featuring
+                        INNER JOIN shows_person ON shows_person.id = shows_episode_featuring.person_id
+                        WHERE shows_episode_featuring.episode_id = shows_episode.id
+                    ), '')), 'D')
+            ''',
+            reverse_sql=migrations.RunSQL.noop
+        ),
+        migrations.AddIndex(
+            model_name='episode',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='shows_episode_search_gin'),
+        ),
+    ]
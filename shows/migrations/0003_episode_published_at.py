@@ -0,0 +1,40 @@
+# Generated by Django 4.1 on 2026-10-17 21:49
+
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shows', '0002_episode_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='episode',
+            name='published_at',
+            field=models.DateTimeField(blank=True, help_text='Enter date and time the episode was published (set from YouTube video if empty).', null=True),
+        ),
+        # Set publish date of existing episodes from their YouTube video
+        migrations.RunSQL(
+            sql='''
+                UPDATE shows_episode SET published_at = shows_youtubevideo.published_at
+                FROM shows_youtubevideo
+                WHERE shows_youtubevideo.id = shows_episode.youtube_video_id AND shows_episode.published_at IS NULL
+            ''',
+            reverse_sql=migrations.RunSQL.noop
+        ),
+        migrations.AddIndex(
+            model_name='episode',
+            index=models.Index(fields=['show', 'published_at', 'id'], name='shows_episode_show_pub_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='episode',
+            index=models.Index(fields=['published_at', 'id'], name='shows_episode_pub_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='episode',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['headings'], name='shows_episode_headings_gin'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.1 on 2026-10-17 21:50
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shows', '0003_episode_published_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ShowStatistics',
+            fields=[
+                ('show', models.OneToOneField(help_text='Show the statistics are for.', on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='statistics', serialize=False, to='shows.show')),
+                ('episode_count', models.PositiveIntegerField(default=0, help_text='Number of episodes of the show.')),
+                ('total_views', models.BigIntegerField(default=0, help_text='Total YouTube views of episodes of the show.')),
+                ('average_views', models.FloatField(default=0, help_text='Average YouTube views of episodes of the show with a YouTube video.')),
+                ('top_guests', models.JSONField(blank=True, default=list, help_text='JSON list of people featured most in the show, as dicts with keys "name", "slug" and "episode_count".')),
+                ('updated_at', models.DateTimeField(auto_now=True, help_text='Date and time the statistics were last refreshed.')),
+                ('latest_episode', models.ForeignKey(blank=True, help_text='Most recently published episode of the show.', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='shows.episode')),
+            ],
+            options={
+                'verbose_name': 'Show Statistics',
+                'verbose_name_plural': 'Show Statistics',
+            },
+        ),
+    ]
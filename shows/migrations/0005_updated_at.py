@@ -0,0 +1,27 @@
+# Generated by Django 4.1 on 2026-10-17 21:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shows', '0004_show_statistics'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='episode',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, help_text='Date and time the episode was last updated (including people featured and show).'),
+        ),
+        migrations.AddField(
+            model_name='show',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, help_text='Date and time the show was last updated.'),
+        ),
+        migrations.AddIndex(
+            model_name='episode',
+            index=models.Index(fields=['updated_at'], name='shows_episode_updated_at_idx'),
+        ),
+    ]
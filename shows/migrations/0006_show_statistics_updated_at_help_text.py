@@ -0,0 +1,18 @@
+# Generated by Django 4.1 on 2026-10-17 22:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shows', '0005_updated_at'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='showstatistics',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, help_text='Date and time the statistics last changed.'),
+        ),
+    ]
@@ -1,4 +1,17 @@
+import base64
+import datetime
+
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.expressions import ArraySubquery
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchHeadline, SearchQuery, SearchRank, SearchVector, SearchVectorField
 from django.db import models
+from django.db.models.fields.json import KeyTextTransform
+from django.utils import timezone
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .cache import bump_versions
 
 # Create your models here.
 
@@ -8,6 +21,7 @@ class Show(models.Model):
     name = models.CharField(max_length=100, help_text='Enter name of the show.')
     description = models.TextField(blank=True, help_text='Enter description of the show.')
     slug = models.SlugField(max_length=100, unique=True, null=False, help_text='Enter a url-safe, unique, lower-case version of the show.')
+    updated_at = models.DateTimeField(auto_now=True, help_text='Date and time the show was last updated.')
 
     # Metadata
 
@@ -19,6 +33,306 @@ class Show(models.Model):
     def __str__(self):
         return self.name
 
+class Person(models.Model):
+    # Fields
+
+    name = models.CharField(max_length=100, help_text='Enter name of the person.')
+    slug = models.SlugField(max_length=100, unique=True, null=False, help_text='Enter a url-safe, unique, lower-case version of the person.')
+
+    # Metadata
+
+    class Meta:
+        ordering = ['name']
+
+    # Methods
+
+    def __str__(self):
+        return self.name
+
+class YouTubeVideo(models.Model):
+    # Fields
+
+    video_id = models.CharField(max_length=20, unique=True, verbose_name='Video ID', help_text='Enter ID of the YouTube video.')
+    title = models.CharField(max_length=100, help_text='Enter title of the YouTube video.')
+    description = models.TextField(blank=True, help_text='Enter description of the YouTube video.')
+    published_at = models.DateTimeField(null=True, blank=True, help_text='Enter date and time the YouTube video was published.')
+    thumbnails = models.JSONField(null=True, blank=True, help_text='Enter JSON of thumbnails from YouTube Data API.')
+    statistics = models.JSONField(null=True, blank=True, help_text='Enter JSON of statistics (views, likes, comments) from YouTube Data API.')
+
+    # Metadata
+
+    class Meta:
+        verbose_name = 'YouTube Video'
+
+    # Methods
+
+    def __str__(self):
+        return self.title
+
+class ExternalLink(models.Model):
+    # Fields
+
+    title = models.CharField(max_length=100, blank=True, help_text='Enter title of the link.')
+    url = models.URLField(max_length=500, unique=True, verbose_name='URL', help_text='Enter URL of the link.')
+
+    # Metadata
+
+    class Meta:
+        verbose_name = 'External Link'
+
+    # Methods
+
+    def __str__(self):
+        return self.title or self.url
+
+class JSONValuesText(models.Func):
+    '''Text of all values of a JSON object joined by spaces (ex. content of Episode.headings without the heading titles).'''
+    template = "(SELECT string_agg(value, ' ') FROM jsonb_each_text(CASE WHEN jsonb_typeof(%(expressions)s) = 'object' THEN %(expressions)s ELSE '{}'::jsonb END))"
+    output_field = models.TextField()
+
+class EpisodeQuerySet(models.QuerySet):
+    def with_related(self):
+        '''
+        Joins show, host and YouTube video, and aggregates names of people featured, so listing episodes takes a constant number of queries.
+
+        Returns:
+            EpisodeQuerySet: Episodes with 'featuring_names' annotation (list of names sorted alphabetically)
+        '''
+        return self.select_related('show', 'host', 'youtube_video').with_featuring_names()
+
+    def with_featuring_names(self):
+        '''
+        Selects names of people featured in each episode in the same query.
+        Uses a subquery per episode instead of grouping, so it is only run for episodes in a page (ex. with keyset_page()).
+
+        Returns:
+            EpisodeQuerySet: Episodes with 'featuring_names' annotation (list of names sorted alphabetically)
+        '''
+        return self.annotate(featuring_names=ArraySubquery(
+            Person.objects.filter(shows_episodes_featuring=models.OuterRef('pk')).order_by('name').values('name')
+        ))
+
+    def keyset_page(self, cursor = None, page_size = 20, newest_first = True):
+        '''
+        Returns page of episodes sorted by publish date, starting after the cursor of the previous page.
+        Filters on (published_at, id) instead of using OFFSET, so every page costs the same as the first.
+
+        Parameters:
+            cursor (str|None): Cursor returned with the previous page (None for first page)
+            page_size (int): Max number of episodes in page
+            newest_first (bool): If True, sorts by publish date newest first, else oldest first
+
+        Returns:
+            tuple: (<episodes(list)>, <next_cursor(str|None)>), next cursor is None for the last page
+
+        Raises:
+            ValueError: If cursor is invalid
+
+        Notes:
+        - Episodes without a publish date are NOT included.
+        - Filter by show before calling for the (show, published_at) index to be used (ex. Episode.objects.filter(show=show).keyset_page()).
+        '''
+        return EpisodeQuerySet.split_keyset_page(list(self.keyset_filter(cursor, page_size, newest_first)), page_size)
+
+    async def akeyset_page(self, cursor = None, page_size = 20, newest_first = True):
+        '''
+        Async version of keyset_page().
+
+        Parameters:
+            cursor (str|None): Cursor returned with the previous page (None for first page)
+            page_size (int): Max number of episodes in page
+            newest_first (bool): If True, sorts by publish date newest first, else oldest first
+
+        Returns:
+            tuple: (<episodes(list)>, <next_cursor(str|None)>), next cursor is None for the last page
+
+        Raises:
+            ValueError: If cursor is invalid
+        '''
+        episodes = [episode async for episode in self.keyset_filter(cursor, page_size, newest_first)]
+        return EpisodeQuerySet.split_keyset_page(episodes, page_size)
+
+    def keyset_filter(self, cursor = None, page_size = 20, newest_first = True):
+        '''
+        Returns unevaluated page of episodes used by keyset_page(), including one extra episode to know if there is a next page.
+
+        Parameters:
+            cursor (str|None): Cursor returned with the previous page (None for first page)
+            page_size (int): Max number of episodes in page
+            newest_first (bool): If True, sorts by publish date newest first, else oldest first
+
+        Returns:
+            EpisodeQuerySet: Sliced episodes
+
+        Raises:
+            ValueError: If cursor is invalid
+        '''
+        episodes = self.filter(published_at__isnull=False)
+        if newest_first:
+            episodes = episodes.order_by('-published_at', '-pk')
+        else:
+            episodes = episodes.order_by('published_at', 'pk')
+
+        if cursor is not None:
+            published_at, pk = EpisodeQuerySet.decode_cursor(cursor)
+            # Redundant range condition on published_at lets the index scan start at the cursor
+            if newest_first:
+                episodes = episodes.filter(published_at__lte=published_at).filter(
+                    models.Q(published_at__lt=published_at) | models.Q(published_at=published_at, pk__lt=pk)
+                )
+            else:
+                episodes = episodes.filter(published_at__gte=published_at).filter(
+                    models.Q(published_at__gt=published_at) | models.Q(published_at=published_at, pk__gt=pk)
+                )
+
+        return episodes[:page_size + 1]
+
+    @staticmethod
+    def split_keyset_page(episodes, page_size):
+        '''
+        Returns page of episodes without the extra episode requested by keyset_filter(), and cursor of next page.
+
+        Parameters:
+            episodes (list): Episodes from keyset_filter()
+            page_size (int): Max number of episodes in page
+
+        Returns:
+            tuple: (<episodes(list)>, <next_cursor(str|None)>), next cursor is None for the last page
+        '''
+        if len(episodes) <= page_size:
+            return episodes, None
+        episodes = episodes[:page_size]
+        return episodes, EpisodeQuerySet.encode_cursor(episodes[-1].published_at, episodes[-1].pk)
+
+    @staticmethod
+    def encode_cursor(published_at, pk):
+        '''
+        Returns URL safe cursor of episode position used by keyset_page().
+
+        Parameters:
+            published_at (datetime): Publish date of last episode of page
+            pk (int): Primary key of last episode of page
+
+        Returns:
+            str: Cursor
+        '''
+        return base64.urlsafe_b64encode(f'{published_at.isoformat()}|{pk}'.encode('utf-8')).decode('ascii')
+
+    @staticmethod
+    def decode_cursor(cursor):
+        '''
+        Returns episode position from cursor created by encode_cursor().
+
+        Parameters:
+            cursor (str): Cursor
+
+        Returns:
+            tuple: (<published_at(aware datetime)>, <pk(int)>)
+
+        Raises:
+            ValueError: If cursor is invalid
+        '''
+        try:
+            published_at, pk = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8').split('|')
+            published_at, pk = datetime.datetime.fromisoformat(published_at), int(pk)
+        except (ValueError, UnicodeError) as error:
+            raise ValueError(f'Invalid episode cursor: {cursor}') from error
+        # Cursors without a UTC offset (ex. edited by hand) are in UTC, like publish dates stored in the database
+        if timezone.is_naive(published_at):
+            published_at = timezone.make_aware(published_at, datetime.timezone.utc)
+        return published_at, pk
+
+    def update_search_vector(self):
+        '''
+        Updates stored search vector of episodes in a single query (title > headings content > show name > people featured).
+
+        Returns:
+            int: Number of episodes updated
+        '''
+        show_name = Show.objects.filter(pk=models.OuterRef('show_id')).values('name')
+        featuring_names = (
+            Episode.featuring.through.objects
+            .filter(episode_id=models.OuterRef('pk'))
+            .values('episode_id')
+            .annotate(names=StringAgg('person__name', ' '))
+            .values('names')
+        )
+        return self.update(search_vector=(
+            SearchVector('title', weight='A', config=Episode.SEARCH_CONFIG)
+            + SearchVector(JSONValuesText('headings'), weight='B', config=Episode.SEARCH_CONFIG)
+            + SearchVector(models.Subquery(show_name), weight='C', config=Episode.SEARCH_CONFIG)
+            + SearchVector(models.Subquery(featuring_names), weight='D', config=Episode.SEARCH_CONFIG)
+        ))
+
+    def search(self, text):
+        '''
+        Filters episodes matching search text using the GIN indexed search vector, best matches first.
+
+        Parameters:
+            text (str): Search text, supports web search syntax (ex. '"final fantasy" -remake', 'zelda or metroid')
+
+        Returns:
+            EpisodeQuerySet: Matching episodes with 'rank' annotation, sorted by rank
+        '''
+        query = SearchQuery(text, search_type='websearch', config=Episode.SEARCH_CONFIG)
+        return (
+            self.filter(search_vector=query)
+            .annotate(rank=SearchRank(models.F('search_vector'), query))
+            .order_by('-rank', '-pk')
+        )
+
+    def search_with_headlines(self, text, limit = 20, offset = 0):
+        '''
+        Returns page of episodes matching search text with matched words highlighted.
+        Headlines are only generated for episodes in the page, since generating them is much slower than ranking.
+
+        Parameters:
+            text (str): Search text, supports web search syntax
+            limit (int): Max number of episodes
+            offset (int): Number of best matching episodes to skip
+
+        Returns:
+            list: Episodes sorted by rank with 'rank', 'title_headline' and 'headings_headline' annotations (safe HTML, text is escaped and matched words are wrapped in <b></b>)
+        '''
+        ranks = dict(self.search(text).values_list('pk', 'rank')[offset:offset + limit])
+        if not ranks:
+            return []
+
+        query = SearchQuery(text, search_type='websearch', config=Episode.SEARCH_CONFIG)
+        episodes = self.model.objects.filter(pk__in=ranks).select_related('show').annotate(
+            title_headline=SearchHeadline(
+                'title', query, config=Episode.SEARCH_CONFIG, highlight_all=True,
+                start_sel=Episode.HEADLINE_START_SEL, stop_sel=Episode.HEADLINE_STOP_SEL
+            ),
+            headings_headline=SearchHeadline(
+                JSONValuesText('headings'), query, config=Episode.SEARCH_CONFIG, max_fragments=2, min_words=5, max_words=20,
+                start_sel=Episode.HEADLINE_START_SEL, stop_sel=Episode.HEADLINE_STOP_SEL
+            ),
+        )
+        for episode in episodes:
+            episode.rank = ranks[episode.pk]
+            episode.title_headline = EpisodeQuerySet.make_safe_headline(episode.title_headline)
+            episode.headings_headline = EpisodeQuerySet.make_safe_headline(episode.headings_headline)
+        return sorted(episodes, key=lambda episode: (-episode.rank, -episode.pk))
+
+    @staticmethod
+    def make_safe_headline(headline):
+        '''
+        Returns headline as safe HTML, escaping its text and then replacing markers of matched words with <b></b>.
+
+        Parameters:
+            headline (str|None): Headline from ts_headline() with matched words between Episode.HEADLINE_START_SEL and Episode.HEADLINE_STOP_SEL
+
+        Returns:
+            SafeString|None: Headline that can be shown in templates without escaping
+        '''
+        if headline is None:
+            return None
+        # Markers are control characters, so they are NOT changed by escape()
+        return mark_safe(
+            escape(headline).replace(Episode.HEADLINE_START_SEL, '<b>').replace(Episode.HEADLINE_STOP_SEL, '</b>')
+        )
+
 class Episode(models.Model):
     # Fields
 
@@ -30,18 +344,183 @@ class Episode(models.Model):
     external_links = models.ManyToManyField(ExternalLink, blank=True, verbose_name='External Links', help_text='Enter any external URL links (NOT including YouTube video).')
     headings = models.JSONField(null=True, blank=True, help_text='Enter JSON of different headings with key being the heading title and value being the content.')
     slug = models.SlugField(max_length=100, unique=True, null=False, help_text='Enter a url-safe, unique, lower-case version of the episode.')
+    published_at = models.DateTimeField(null=True, blank=True, help_text='Enter date and time the episode was published (set from YouTube video if empty).')
+    updated_at = models.DateTimeField(auto_now=True, help_text='Date and time the episode was last updated (including people featured and show).')
+    search_vector = SearchVectorField(null=True, editable=False, help_text='Weighted full text search vector of title, headings, show and people featured (updated automatically).')
+
+    # Static Properties
+
+    # Text search configuration of search vector and search queries
+    SEARCH_CONFIG = 'english'
+
+    # Markers of matched words in search headlines, replaced with <b></b> after headlines are escaped (see EpisodeQuerySet.make_safe_headline())
+    HEADLINE_START_SEL = '\x02'
+    HEADLINE_STOP_SEL = '\x03'
+
+    # Managers
+
+    objects = EpisodeQuerySet.as_manager()
 
     # Metadata
 
     class Meta:
-        pass
+        constraints = [
+            models.UniqueConstraint(fields=['youtube_video'], name='unique_episode_youtube_video'),
+        ]
+        indexes = [
+            GinIndex(fields=['search_vector'], name='shows_episode_search_gin'),
+            # Used for keyset pagination of episodes of a show (scanned backwards for newest first)
+            models.Index(fields=['show', 'published_at', 'id'], name='shows_episode_show_pub_idx'),
+            models.Index(fields=['published_at', 'id'], name='shows_episode_pub_idx'),
+            GinIndex(fields=['headings'], name='shows_episode_headings_gin'),
+            # Used to find newest update for conditional requests of JSON API
+            models.Index(fields=['updated_at'], name='shows_episode_updated_at_idx'),
+        ]
 
     # Methods
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        # Use publish date of YouTube video if episode does NOT have one
+        if self.published_at is None and self.youtube_video_id is not None:
+            self.published_at = self.youtube_video.published_at
+            # Publish date is only saved if it is included in update_fields (empty update_fields still skips the save)
+            if self.published_at is not None and kwargs.get('update_fields'):
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'published_at'}
+        super().save(*args, **kwargs)
+
     def display_featuring(self):
+        # Use names aggregated by EpisodeQuerySet.with_featuring_names() to avoid a query per episode
+        if hasattr(self, 'featuring_names'):
+            return ', '.join(self.featuring_names[:3])
         return ', '.join( person.__str__() for person in self.featuring.all()[:3] )
 
     display_featuring.short_description = 'Featuring'
+
+class ShowStatistics(models.Model):
+    # Fields
+
+    show = models.OneToOneField(Show, on_delete=models.CASCADE, primary_key=True, related_name='statistics', help_text='Show the statistics are for.')
+    episode_count = models.PositiveIntegerField(default=0, help_text='Number of episodes of the show.')
+    total_views = models.BigIntegerField(default=0, help_text='Total YouTube views of episodes of the show.')
+    average_views = models.FloatField(default=0, help_text='Average YouTube views of episodes of the show with a YouTube video.')
+    latest_episode = models.ForeignKey(Episode, on_delete=models.SET_NULL, blank=True, null=True, related_name='+', help_text='Most recently published episode of the show.')
+    top_guests = models.JSONField(default=list, blank=True, help_text='JSON list of people featured most in the show, as dicts with keys "name", "slug" and "episode_count".')
+    updated_at = models.DateTimeField(auto_now=True, help_text='Date and time the statistics last changed.')
+
+    # Static Properties
+
+    # Number of people kept in top guests of each show
+    TOP_GUESTS_LIMIT = 5
+
+    # Metadata
+
+    class Meta:
+        verbose_name = 'Show Statistics'
+        verbose_name_plural = 'Show Statistics'
+
+    # Methods
+
+    def __str__(self):
+        return f'Statistics of {self.show}'
+
+    @staticmethod
+    def get_for_show(show):
+        '''
+        Returns stored statistics of show without any aggregation, or empty statistics if show has none yet.
+
+        Parameters:
+            show (Show): Show (use select_related('statistics') when listing shows to avoid a query per show)
+
+        Returns:
+            ShowStatistics: Statistics of show
+        '''
+        try:
+            return show.statistics
+        except ShowStatistics.DoesNotExist:
+            return ShowStatistics(show=show)
+
+    @staticmethod
+    def refresh(show_ids = None):
+        '''
+        Recomputes stored statistics of only the given shows, using the same number of queries for any number of shows, and bumps their cache versions.
+
+        Parameters:
+            show_ids (iterable|None): ID's of shows to refresh (all shows if None)
+
+        Returns:
+            int: Number of shows refreshed
+        '''
+        if show_ids is None:
+            show_ids = list(Show.objects.values_list('pk', flat=True))
+        else:
+            # Episodes without a show have no statistics, and shows may have been deleted since
+            show_ids = list(Show.objects.filter(pk__in={show_id for show_id in show_ids if show_id is not None}).values_list('pk', flat=True))
+        if not show_ids:
+            return 0
+
+        episodes = Episode.objects.filter(show_id__in=show_ids)
+        views = models.functions.Cast(KeyTextTransform('viewCount', 'youtube_video__statistics'), models.BigIntegerField())
+        totals = {
+            row['show_id']: row
+            for row in episodes.order_by().values('show_id').annotate(
+                episode_count=models.Count('pk'),
+                total_views=models.Sum(views, default=0),
+                average_views=models.Avg(views, default=0.0),
+            )
+        }
+        # Newest episode of each show (DISTINCT ON show uses the (show, published_at) index)
+        latest_episode_ids = dict(
+            episodes.filter(published_at__isnull=False)
+            .order_by('show_id', '-published_at', '-pk')
+            .distinct('show_id')
+            .values_list('show_id', 'pk')
+        )
+        top_guests = {}
+        guest_counts = (
+            Episode.featuring.through.objects
+            .filter(episode__show_id__in=show_ids)
+            .values('episode__show_id', 'person__name', 'person__slug')
+            .annotate(episode_count=models.Count('episode_id'))
+            .order_by('episode__show_id', '-episode_count', 'person__name')
+        )
+        for row in guest_counts:
+            guests = top_guests.setdefault(row['episode__show_id'], [])
+            if len(guests) < ShowStatistics.TOP_GUESTS_LIMIT:
+                guests.append({'name': row['person__name'], 'slug': row['person__slug'], 'episode_count': row['episode_count']})
+
+        # Update date only changes if statistics changed, so conditional requests of JSON API still match after a refresh
+        tracked_fields = ['episode_count', 'total_views', 'average_views', 'latest_episode_id', 'top_guests']
+        previous_statistics = {
+            row[0]: row[1:]
+            for row in ShowStatistics.objects.filter(show_id__in=show_ids).values_list('show_id', *tracked_fields)
+        }
+        statistics = [
+            ShowStatistics(
+                show_id=show_id,
+                episode_count=totals.get(show_id, {}).get('episode_count', 0),
+                total_views=totals.get(show_id, {}).get('total_views', 0),
+                average_views=totals.get(show_id, {}).get('average_views', 0.0),
+                latest_episode_id=latest_episode_ids.get(show_id),
+                top_guests=top_guests.get(show_id, []),
+            )
+            for show_id in show_ids
+        ]
+        ShowStatistics.objects.bulk_create(
+            statistics,
+            update_conflicts=True,
+            unique_fields=['show_id'],
+            update_fields=tracked_fields
+        )
+        changed_show_ids = [
+            show_statistics.show_id for show_statistics in statistics
+            if show_statistics.show_id in previous_statistics
+            and previous_statistics[show_statistics.show_id] != tuple(getattr(show_statistics, field) for field in tracked_fields)
+        ]
+        if changed_show_ids:
+            ShowStatistics.objects.filter(show_id__in=changed_show_ids).update(updated_at=timezone.now())
+        # Cached pages and fragments of shows include their statistics
+        bump_versions([('shows',)] + [('show', show_id) for show_id in show_ids])
+        return len(show_ids)
@@ -0,0 +1,142 @@
+from django.db.models import Q
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .cache import bump_versions
+from .models import Show, Person, YouTubeVideo, ExternalLink, Episode, ShowStatistics
+
+# Search vector of episodes is updated in SQL with QuerySet.update(), which does NOT send signals
+# Versions of cached pages and fragments are bumped for every object that changed (see cache.py)
+
+def update_episodes(episode_ids):
+    '''
+    Updates search vector and update date of episodes and statistics of their shows.
+
+    Parameters:
+        episode_ids (iterable): ID's of episodes that changed
+    '''
+    episode_ids = list(episode_ids)
+    episodes = Episode.objects.filter(pk__in=episode_ids)
+    episodes.update_search_vector()
+    # People featured are included in episodes of JSON API, so conditional requests must see the change
+    episodes.update(updated_at=timezone.now())
+    ShowStatistics.refresh(episodes.values_list('show_id', flat=True).distinct())
+    bump_versions([('shows',)] + [('episode', episode_id) for episode_id in episode_ids])
+
+@receiver(pre_save, sender=Episode)
+def store_previous_show_id(sender, instance, raw = False, **kwargs):
+    # Statistics of previous show also change if episode moved to another show
+    if not raw and instance.pk is not None:
+        instance._previous_show_id = Episode.objects.filter(pk=instance.pk).values_list('show_id', flat=True).first()
+
+@receiver(post_save, sender=Episode)
+def update_episode(sender, instance, raw = False, **kwargs):
+    if not raw:
+        Episode.objects.filter(pk=instance.pk).update_search_vector()
+        ShowStatistics.refresh({instance.show_id, getattr(instance, '_previous_show_id', None)})
+        bump_versions([('shows',), ('episode', instance.pk)])
+
+@receiver(post_delete, sender=Episode)
+def update_deleted_episode_show(sender, instance, **kwargs):
+    ShowStatistics.refresh([instance.show_id])
+    bump_versions([('shows',), ('episode', instance.pk)])
+
+@receiver(post_save, sender=YouTubeVideo)
+def update_youtube_video_show(sender, instance, created = False, raw = False, **kwargs):
+    # Views of YouTube video are included in statistics of show of its episode (new videos do NOT have an episode yet)
+    if not created and not raw:
+        episodes = list(Episode.objects.filter(youtube_video=instance).values_list('pk', 'show_id'))
+        ShowStatistics.refresh([show_id for _, show_id in episodes])
+        bump_versions([('shows',)] + [('episode', episode_id) for episode_id, _ in episodes])
+
+def get_person_episodes(person):
+    '''
+    Returns episodes the person hosts or is featured in.
+
+    Parameters:
+        person (Person): Person
+
+    Returns:
+        QuerySet: Episodes
+    '''
+    return Episode.objects.filter(Q(featuring=person) | Q(host=person)).distinct()
+
+@receiver(post_save, sender=Show)
+def update_show_episodes(sender, instance, created = False, raw = False, **kwargs):
+    # New shows do NOT have episodes yet
+    episode_ids = []
+    if not created and not raw:
+        episodes = Episode.objects.filter(show=instance)
+        episodes.update_search_vector()
+        # Show slug is included in episodes of JSON API
+        episodes.update(updated_at=timezone.now())
+        # Show name is included in cached fragments of episodes
+        episode_ids = list(episodes.values_list('pk', flat=True))
+    bump_versions([('shows',), ('show', instance.pk)] + [('episode', episode_id) for episode_id in episode_ids])
+
+@receiver(post_save, sender=Person)
+def update_person_episodes(sender, instance, created = False, raw = False, **kwargs):
+    if not created and not raw:
+        update_episodes(get_person_episodes(instance).values_list('pk', flat=True))
+
+@receiver(post_save, sender=ExternalLink)
+def update_external_link_episodes(sender, instance, created = False, raw = False, **kwargs):
+    # Titles of external links are included in cached fragments of episodes (new links do NOT have episodes yet)
+    if not created and not raw:
+        episode_ids = Episode.objects.filter(external_links=instance).values_list('pk', flat=True)
+        bump_versions([('shows',)] + [('episode', episode_id) for episode_id in episode_ids])
+
+@receiver(pre_delete, sender=Show)
+@receiver(pre_delete, sender=Person)
+@receiver(pre_delete, sender=ExternalLink)
+def store_deleted_episode_ids(sender, instance, **kwargs):
+    # Episodes are unlinked by the database during delete, so their ID's are stored before
+    if sender is Show:
+        episodes = Episode.objects.filter(show=instance)
+    elif sender is Person:
+        episodes = get_person_episodes(instance)
+    else:
+        episodes = Episode.objects.filter(external_links=instance)
+    instance._affected_episode_ids = list(episodes.values_list('pk', flat=True))
+
+@receiver(post_delete, sender=Show)
+@receiver(post_delete, sender=Person)
+def update_deleted_episodes(sender, instance, **kwargs):
+    episode_ids = getattr(instance, '_affected_episode_ids', None)
+    if episode_ids:
+        update_episodes(episode_ids)
+    bump_versions([('shows',), (sender.__name__.lower(), instance.pk)])
+
+@receiver(post_delete, sender=ExternalLink)
+def update_deleted_external_link_episodes(sender, instance, **kwargs):
+    # External links are NOT included in search vector or JSON API, so only cache versions of episodes change
+    bump_versions([('shows',)] + [('episode', episode_id) for episode_id in getattr(instance, '_affected_episode_ids', [])])
+
+@receiver(m2m_changed, sender=Episode.featuring.through)
+def update_featuring_episodes(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        # Episode's people featured changed
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            update_episodes([instance.pk])
+    elif action == 'pre_clear':
+        # Person removed from all episodes, so their ID's are stored before
+        instance._affected_episode_ids = list(Episode.objects.filter(featuring=instance).values_list('pk', flat=True))
+    elif action == 'post_clear':
+        update_episodes(getattr(instance, '_affected_episode_ids', []))
+    elif action in ('post_add', 'post_remove') and pk_set:
+        update_episodes(pk_set)
+
+@receiver(m2m_changed, sender=Episode.external_links.through)
+def update_external_links_episodes(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        # Episode's external links changed
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            bump_versions([('shows',), ('episode', instance.pk)])
+    elif action == 'pre_clear':
+        # External link removed from all episodes, so their ID's are stored before
+        instance._affected_episode_ids = list(Episode.objects.filter(external_links=instance).values_list('pk', flat=True))
+    elif action == 'post_clear':
+        bump_versions([('shows',)] + [('episode', episode_id) for episode_id in getattr(instance, '_affected_episode_ids', [])])
+    elif action in ('post_add', 'post_remove') and pk_set:
+        bump_versions([('shows',)] + [('episode', episode_id) for episode_id in pk_set])
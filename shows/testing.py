@@ -0,0 +1,27 @@
+# Helpers shared by tests of all apps
+
+import tempfile
+
+from django.test import override_settings
+
+# Cache of tests that don't check cached pages, where version keyed caching is disabled (see cache.is_version_caching_enabled)
+LOCAL_MEMORY_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+class FileCacheTestMixin:
+    '''
+    Mixin of test cases using an empty file cache for each test.
+
+    Notes:
+        Version keyed caching needs a cache shared by all processes, so a file cache is used
+    '''
+
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings_override = override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': directory.name,
+        }})
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
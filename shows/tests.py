@@ -1,3 +1,337 @@
-from django.test import TestCase
+import base64
+import datetime
+import io
+import json
+import os
+import tempfile
+import warnings
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from .cache import bump_versions, check_cache_backend
+
+from .models import Show, Person, YouTubeVideo, ExternalLink, Episode, EpisodeQuerySet, ShowStatistics
+from .testing import LOCAL_MEMORY_CACHES, FileCacheTestMixin
+
+def build_video_record(video_id, title, show = 'Other', featuring = None, published_at = '2022-03-27T22:09:48Z', view_count = 100):
+    '''Returns video data like records of YouTube Data API, with keys added by classifying videos.'''
+    return {
+        'id': video_id,
+        'snippet': {'title': title, 'description': f'Description of {title}', 'publishedAt': published_at},
+        'statistics': {'viewCount': str(view_count)},
+        'show': show,
+        'featuring': featuring or [],
+    }
+
+def import_video_records(records):
+    '''Imports video data with import_youtube_videos command, using a temporary newline-delimited JSON file.'''
+    with tempfile.NamedTemporaryFile('w', suffix='.ndjson', delete=False) as file:
+        for record in records:
+            file.write(json.dumps(record) + '\n')
+    try:
+        call_command('import_youtube_videos', json_lines=file.name, stdout=io.StringIO())
+    finally:
+        os.remove(file.name)
+
+@override_settings(CACHES=LOCAL_MEMORY_CACHES)
+class ImportYouTubeVideosTests(TestCase):
+    def get_update_dates(self):
+        return (
+            dict(Episode.objects.values_list('youtube_video__video_id', 'updated_at')),
+            dict(Show.objects.values_list('slug', 'updated_at')),
+            dict(ShowStatistics.objects.values_list('show__slug', 'updated_at')),
+        )
+
+    def test_import_of_same_data_keeps_update_dates(self):
+        records = [
+            build_video_record('video1', 'First Episode', 'Game Club', ['Ben Hanson']),
+            build_video_record('video2', 'Second Episode', 'Game Club'),
+        ]
+        import_video_records(records)
+        update_dates = self.get_update_dates()
+
+        import_video_records(records)
+        self.assertEqual(self.get_update_dates(), update_dates)
+
+    def test_import_of_changed_data_only_changes_update_dates_of_changed_rows(self):
+        records = [
+            build_video_record('video1', 'First Episode', 'Game Club'),
+            build_video_record('video2', 'Second Episode', 'Game Club'),
+            build_video_record('video3', 'Third Episode', 'Other'),
+        ]
+        import_video_records(records)
+        episode_dates, show_dates, statistics_dates = self.get_update_dates()
+
+        records[0]['snippet']['title'] = 'First Episode (Remastered)'
+        records[2]['featuring'] = ['Ben Hanson']
+        import_video_records(records)
+        new_episode_dates, new_show_dates, new_statistics_dates = self.get_update_dates()
+
+        self.assertGreater(new_episode_dates['video1'], episode_dates['video1'])
+        self.assertEqual(new_episode_dates['video2'], episode_dates['video2'])
+        self.assertGreater(new_episode_dates['video3'], episode_dates['video3'])
+        self.assertEqual(new_show_dates, show_dates)
+        # Statistics only include views, guests and latest episode, which did NOT change
+        self.assertEqual(new_statistics_dates, statistics_dates)
+
+@override_settings(CACHES=LOCAL_MEMORY_CACHES)
+class EpisodeSearchTests(TestCase):
+    def test_search_headlines_are_escaped(self):
+        Episode.objects.create(
+            title='<script>alert(1)</script> Game Club & Friends',
+            slug='game-club',
+            headings={'Intro': 'Talking about <i>Game</i> design for a while with friends'},
+        )
+
+        episode, = Episode.objects.search_with_headlines('game')
+        self.assertEqual(episode.title_headline, '&lt;script&gt;alert(1)&lt;/script&gt; <b>Game</b> Club &amp; Friends')
+        # Fragments of headings leave out HTML tags of the text, so only highlights are tags
+        self.assertIn('<b>Game</b>', episode.headings_headline)
+        self.assertNotIn('<i>', episode.headings_headline)
+
+@override_settings(CACHES=LOCAL_MEMORY_CACHES)
+class EpisodeCursorTests(TestCase):
+    def test_decode_cursor_returns_encoded_position(self):
+        published_at = datetime.datetime(2022, 3, 27, 22, 9, 48, tzinfo=datetime.timezone.utc)
+        cursor = EpisodeQuerySet.encode_cursor(published_at, 12)
+        self.assertEqual(EpisodeQuerySet.decode_cursor(cursor), (published_at, 12))
+
+    def test_decode_cursor_without_offset_returns_aware_datetime(self):
+        cursor = base64.urlsafe_b64encode(b'2022-03-27T22:09:48|12').decode('ascii')
+        published_at, pk = EpisodeQuerySet.decode_cursor(cursor)
+        self.assertEqual(published_at, datetime.datetime(2022, 3, 27, 22, 9, 48, tzinfo=datetime.timezone.utc))
+
+        # Naive datetimes in queries warn when time zone support is active
+        with warnings.catch_warnings():
+            warnings.simplefilter('error', RuntimeWarning)
+            list(Episode.objects.keyset_filter(cursor, 20, True))
+
+    def test_decode_cursor_raises_if_cursor_is_invalid(self):
+        for cursor in ('bad', base64.urlsafe_b64encode(b'not a date|12').decode('ascii'), base64.urlsafe_b64encode(b'2022-03-27|x').decode('ascii')):
+            with self.assertRaises(ValueError):
+                EpisodeQuerySet.decode_cursor(cursor)
+
+    def test_invalid_cursor_is_not_found(self):
+        Show.objects.create(name='Game Club', slug='game-club')
+        self.assertEqual(self.client.get('/shows/game-club/', {'cursor': 'bad'}).status_code, 404)
+        self.assertEqual(self.client.get('/api/episodes/', {'cursor': 'bad'}).status_code, 400)
+
+@override_settings(CACHES=LOCAL_MEMORY_CACHES)
+class EpisodeSaveTests(TestCase):
+    def test_save_with_update_fields_saves_publish_date_of_youtube_video(self):
+        published_at = datetime.datetime(2022, 3, 27, 22, 9, 48, tzinfo=datetime.timezone.utc)
+        youtube_video = YouTubeVideo.objects.create(video_id='video1', title='First Episode', published_at=published_at)
+        episode = Episode.objects.create(title='First Episode', slug='first-episode')
+
+        episode.youtube_video = youtube_video
+        episode.save(update_fields=['youtube_video'])
+        episode.refresh_from_db()
+        self.assertEqual(episode.published_at, published_at)
+
+@override_settings(CACHES=LOCAL_MEMORY_CACHES)
+class ShowStatisticsTests(TestCase):
+    def create_episode(self, show, video_id, view_count, days, featuring = ()):
+        youtube_video = YouTubeVideo.objects.create(
+            video_id=video_id,
+            title=video_id,
+            published_at=datetime.datetime(2022, 3, days, tzinfo=datetime.timezone.utc),
+            statistics={'viewCount': str(view_count)} if view_count is not None else None,
+        )
+        episode = Episode.objects.create(show=show, title=video_id, slug=video_id, youtube_video=youtube_video)
+        episode.featuring.set(featuring)
+        return episode
+
+    def test_refresh_stores_statistics_of_episodes(self):
+        show = Show.objects.create(name='Game Club', slug='game-club')
+        ben, leo = Person.objects.create(name='Ben', slug='ben'), Person.objects.create(name='Leo', slug='leo')
+        self.create_episode(show, 'video1', 100, 1, [ben, leo])
+        latest_episode = self.create_episode(show, 'video2', 300, 3, [leo])
+        # Episode without views counts as 0 views
+        self.create_episode(show, 'video3', None, 2)
+
+        self.assertEqual(ShowStatistics.refresh([show.pk]), 1)
+        statistics = ShowStatistics.objects.get(show=show)
+        self.assertEqual(statistics.episode_count, 3)
+        self.assertEqual(statistics.total_views, 400)
+        self.assertEqual(statistics.average_views, 200.0)
+        self.assertEqual(statistics.latest_episode, latest_episode)
+        self.assertEqual(statistics.top_guests, [
+            {'name': 'Leo', 'slug': 'leo', 'episode_count': 2},
+            {'name': 'Ben', 'slug': 'ben', 'episode_count': 1},
+        ])
+
+    def test_refresh_only_changes_given_shows(self):
+        game_club = Show.objects.create(name='Game Club', slug='game-club')
+        minnmax_show = Show.objects.create(name='MinnMax Show', slug='minnmax-show')
+        self.create_episode(game_club, 'video1', 100, 1)
+        self.create_episode(minnmax_show, 'video2', 200, 2)
+
+        # Views changed without signals, like in a bulk import
+        YouTubeVideo.objects.update(statistics={'viewCount': '1000'})
+        ShowStatistics.refresh([game_club.pk, None])
+
+        self.assertEqual(ShowStatistics.get_for_show(Show.objects.get(pk=game_club.pk)).total_views, 1000)
+        self.assertEqual(ShowStatistics.get_for_show(Show.objects.get(pk=minnmax_show.pk)).total_views, 200)
+
+    def test_show_without_episodes_has_empty_statistics(self):
+        show = Show.objects.create(name='Game Club', slug='game-club')
+        ShowStatistics.refresh()
+        statistics = ShowStatistics.get_for_show(Show.objects.get(pk=show.pk))
+        self.assertEqual((statistics.episode_count, statistics.total_views, statistics.latest_episode, statistics.top_guests), (0, 0, None, []))
+
+class CachedPageTests(FileCacheTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.show = Show.objects.create(name='Game Club', slug='game-club')
+        self.episode = Episode.objects.create(
+            show=self.show,
+            title='First Episode',
+            slug='first-episode',
+            published_at=datetime.datetime(2022, 3, 27, tzinfo=datetime.timezone.utc),
+        )
+
+    def get_content(self, path):
+        response = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+        return response.content.decode('utf-8')
+
+    def test_pages_are_cached_until_objects_are_saved(self):
+        self.assertIn('First Episode', self.get_content('/shows/game-club/'))
+        self.assertIn('First Episode', self.get_content('/episodes/first-episode/'))
+
+        # Update without signals does NOT bump versions, so cached pages are still used
+        Episode.objects.filter(pk=self.episode.pk).update(title='Changed Without Signals')
+        self.assertIn('First Episode', self.get_content('/shows/game-club/'))
+        self.assertIn('First Episode', self.get_content('/episodes/first-episode/'))
+
+        self.episode.refresh_from_db()
+        self.episode.title = 'Renamed Episode'
+        self.episode.save()
+        self.assertIn('Renamed Episode', self.get_content('/shows/game-club/'))
+        self.assertIn('Renamed Episode', self.get_content('/episodes/first-episode/'))
+
+        self.show.name = 'Renamed Show'
+        self.show.save()
+        self.assertIn('Renamed Show', self.get_content('/shows/game-club/'))
+
+    def test_fragments_are_cached_until_their_version_is_bumped(self):
+        self.get_content('/shows/game-club/')
+
+        # Page is rendered again, but fragment of episode is still cached
+        Episode.objects.filter(pk=self.episode.pk).update(title='Changed Without Signals')
+        bump_versions([('shows',)])
+        self.assertIn('First Episode', self.get_content('/shows/game-club/'))
+
+        bump_versions([('shows',), ('episode', self.episode.pk)])
+        self.assertIn('Changed Without Signals', self.get_content('/shows/game-club/'))
+
+    def test_pages_are_not_cached_for_logged_in_users(self):
+        self.get_content('/episodes/first-episode/')
+        Episode.objects.filter(pk=self.episode.pk).update(title='Changed Without Signals')
+
+        user = get_user_model().objects.create_user('editor', password='password')
+        self.client.force_login(user)
+        self.assertIn('Changed Without Signals', self.get_content('/episodes/first-episode/'))
+
+    def test_episode_page_changes_after_related_objects_are_saved_or_deleted(self):
+        host = Person.objects.create(name='Ben Hanson', slug='ben-hanson')
+        external_link = ExternalLink.objects.create(title='Game Club Website', url='https://example.com/game-club')
+        self.episode.host = host
+        self.episode.save()
+        self.episode.external_links.add(external_link)
+        content = self.get_content('/episodes/first-episode/')
+        self.assertIn('Game Club', content)
+        self.assertIn('Host: Ben Hanson', content)
+        self.assertIn('Game Club Website', content)
+
+        self.show.name = 'Renamed Show'
+        self.show.save()
+        host.name = 'Renamed Host'
+        host.save()
+        external_link.title = 'Renamed Link'
+        external_link.save()
+        content = self.get_content('/episodes/first-episode/')
+        self.assertIn('Renamed Show', content)
+        self.assertIn('Host: Renamed Host', content)
+        self.assertIn('Renamed Link', content)
+
+        host.delete()
+        external_link.delete()
+        content = self.get_content('/episodes/first-episode/')
+        self.assertNotIn('Host:', content)
+        self.assertNotIn('Renamed Link', content)
+
+    def test_pages_change_after_import(self):
+        video = build_video_record('video1', 'Imported Episode', 'Game Club')
+        import_video_records([video])
+        self.assertIn('Imported Episode', self.get_content('/shows/game-club/'))
+
+        video['snippet']['title'] = 'Imported Episode (Remastered)'
+        import_video_records([video])
+        self.assertIn('Imported Episode (Remastered)', self.get_content('/shows/game-club/'))
+
+class CacheBackendCheckTests(SimpleTestCase):
+    @override_settings(CACHES=LOCAL_MEMORY_CACHES)
+    def test_local_memory_cache_is_warned_about(self):
+        self.assertEqual([warning.id for warning in check_cache_backend(None)], ['shows.W001'])
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': tempfile.gettempdir()}})
+    def test_shared_cache_is_not_warned_about(self):
+        self.assertEqual(check_cache_backend(None), [])
+
+@override_settings(CACHES=LOCAL_MEMORY_CACHES)
+class ConditionalAPITests(TestCase):
+    def setUp(self):
+        self.show = Show.objects.create(name='Game Club', slug='game-club')
+        self.episode = Episode.objects.create(
+            show=self.show,
+            title='First Episode',
+            slug='first-episode',
+            published_at=datetime.datetime(2022, 3, 27, tzinfo=datetime.timezone.utc),
+        )
+
+    def test_request_with_same_etag_is_not_modified(self):
+        for path in ('/api/shows/', '/api/shows/game-club/', '/api/episodes/', '/api/episodes/first-episode/'):
+            response = self.client.get(path)
+            self.assertEqual(response.status_code, 200)
+            self.assertIn('Last-Modified', response.headers)
+
+            not_modified_response = self.client.get(path, HTTP_IF_NONE_MATCH=response.headers['ETag'])
+            self.assertEqual(not_modified_response.status_code, 304, path)
+            self.assertEqual(not_modified_response.headers['ETag'], response.headers['ETag'])
+
+    def test_etag_depends_on_parameters(self):
+        etag = self.client.get('/api/episodes/').headers['ETag']
+        self.assertNotEqual(self.client.get('/api/episodes/', {'fields': 'id,title'}).headers['ETag'], etag)
+        self.assertEqual(self.client.get('/api/episodes/', {'fields': 'id,title'}, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_etag_changes_after_save_delete_and_import(self):
+        def get_etag():
+            return self.client.get('/api/episodes/').headers['ETag']
+
+        etag = get_etag()
+        self.assertEqual(get_etag(), etag)
+
+        self.episode.title = 'Renamed Episode'
+        self.episode.save()
+        self.assertNotEqual(get_etag(), etag)
+
+        # People featured are included in episodes
+        etag = get_etag()
+        self.episode.featuring.add(Person.objects.create(name='Ben Hanson', slug='ben-hanson'))
+        self.assertNotEqual(get_etag(), etag)
+
+        etag = get_etag()
+        import_video_records([build_video_record('video1', 'Imported Episode', 'Game Club')])
+        self.assertNotEqual(get_etag(), etag)
+
+        # Import of the same data does NOT change the ETag
+        etag = get_etag()
+        import_video_records([build_video_record('video1', 'Imported Episode', 'Game Club')])
+        self.assertEqual(get_etag(), etag)
+
+        # Deleted episodes change number of rows, even though the newest update is the same
+        Episode.objects.filter(slug='first-episode').delete()
+        self.assertNotEqual(get_etag(), etag)
@@ -0,0 +1,7 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('shows/<slug:slug>/', views.show_detail, name='show-detail'),
+    path('episodes/<slug:slug>/', views.episode_detail, name='episode-detail'),
+]
@@ -0,0 +1,13 @@
+# Helpers shared by views of all apps
+
+async def alist(queryset):
+    '''
+    Returns results of queryset as a list without blocking the event loop.
+
+    Parameters:
+        queryset (QuerySet): Unevaluated queryset
+
+    Returns:
+        list: Results of queryset
+    '''
+    return [result async for result in queryset]
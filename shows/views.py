@@ -1,3 +1,66 @@
+import asyncio
+
+from django.http import Http404
 from django.shortcuts import render
 
+from .cache import aget_versions, cache_page_by_version, get_fragment_timeout
+from .models import Show, Person, ExternalLink, Episode, ShowStatistics
+from .utils import alist
+
 # Create your views here.
+
+# Number of episodes in each page of a show
+EPISODES_PAGE_SIZE = 20
+
+@cache_page_by_version(('shows',))
+async def show_detail(request, slug):
+    newest_first = request.GET.get('order') != 'oldest'
+
+    # Show, its statistics and its episodes are all found by slug, so they are gathered to run concurrently once the ORM is natively async
+    # (Django 4.1 runs async queries one after another in a single thread)
+    try:
+        show, statistics, (episodes, next_cursor) = await asyncio.gather(
+            Show.objects.aget(slug=slug),
+            ShowStatistics.objects.filter(show__slug=slug).afirst(),
+            Episode.objects.filter(show__slug=slug).with_featuring_names().akeyset_page(request.GET.get('cursor'), EPISODES_PAGE_SIZE, newest_first),
+        )
+    except Show.DoesNotExist:
+        raise Http404('Show does not exist.')
+    except ValueError:
+        raise Http404('Invalid page of episodes.')
+
+    # Versions of show and episodes are requested together, used as keys of cached fragments
+    versions = await aget_versions([('show', show.pk)] + [('episode', episode.pk) for episode in episodes])
+    for episode in episodes:
+        episode.cache_version = versions[('episode', episode.pk)]
+
+    return render(request, 'shows/show_detail.html', {
+        'show': show,
+        'show_version': versions[('show', show.pk)],
+        'statistics': statistics if statistics is not None else ShowStatistics(show=show),
+        'episodes': episodes,
+        'next_cursor': next_cursor,
+        'order': 'newest' if newest_first else 'oldest',
+        'cache_timeout': get_fragment_timeout(),
+    })
+
+@cache_page_by_version(('shows',))
+async def episode_detail(request, slug):
+    # Episode, people featured and external links are all found by slug, so they are gathered to run concurrently once the ORM is natively async
+    # (Django 4.1 runs async queries one after another in a single thread)
+    try:
+        episode, featuring, external_links = await asyncio.gather(
+            Episode.objects.select_related('show', 'host', 'youtube_video').aget(slug=slug),
+            alist(Person.objects.filter(shows_episodes_featuring__slug=slug)),
+            alist(ExternalLink.objects.filter(episode__slug=slug)),
+        )
+    except Episode.DoesNotExist:
+        raise Http404('Episode does not exist.')
+
+    return render(request, 'shows/episode_detail.html', {
+        'episode': episode,
+        'episode_version': (await aget_versions([('episode', episode.pk)]))[('episode', episode.pk)],
+        'featuring': featuring,
+        'external_links': external_links,
+        'cache_timeout': get_fragment_timeout(),
+    })
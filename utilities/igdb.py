@@ -1,104 +1,279 @@
 import requests
 import json
+import os
 import time
 import pprint
 import re
+import threading
 
 from decouple import config
+from response_cache import ResponseCache
+
+class RateLimiter:
+    '''Thread-safe token bucket used to keep requests under an API rate limit.'''
+
+    def __init__(self, rate = 4, burst = 1, max_open_requests = 8):
+        '''
+        The constructor for RateLimiter class.
+
+        Parameters:
+            rate (number): Number of requests allowed per second.
+            burst (number): Max number of tokens the bucket can hold at once.
+            max_open_requests (int): Max number of requests allowed to be open at the same time.
+        '''
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.last_refill = time.monotonic()
+        self.lock = threading.Lock()
+        self.open_requests = threading.BoundedSemaphore(max_open_requests)
+
+        # Stats
+        self.request_count = 0
+        self.total_wait_time = 0.0
+        self.max_wait_time = 0.0
+
+    def __enter__(self):
+        return self.acquire()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
+
+    def acquire(self):
+        '''
+        Blocks until an open request slot and a token are both available.
+
+        Returns:
+            float: Seconds the caller waited before being allowed to make the request.
+        '''
+        start = time.monotonic()
+        self.open_requests.acquire()
+
+        while True:
+            is_taken, seconds = self.try_take_token(start)
+            if is_taken:
+                return seconds
+            time.sleep(seconds)
+
+    def try_take_token(self, start):
+        '''
+        Takes a token if one is available, without waiting (caller must already hold an open request slot).
+
+        Parameters:
+            start (float): time.monotonic() when caller started waiting, used for stats.
+
+        Returns:
+            tuple: (True, <seconds_waited(float)>) if token was taken, else (False, <seconds_until_next_token(float)>).
+        '''
+        with self.lock:
+            now = time.monotonic()
+            # Refill tokens based on time passed since last refill
+            self.tokens = min(self.burst, self.tokens + (now - self.last_refill) * self.rate)
+            self.last_refill = now
+
+            if self.tokens >= 1:
+                self.tokens -= 1
+                wait_time = now - start
+                self.request_count += 1
+                self.total_wait_time += wait_time
+                self.max_wait_time = max(self.max_wait_time, wait_time)
+                return True, wait_time
+
+            # Time until next token is available
+            return False, (1 - self.tokens) / self.rate
+
+    def release(self):
+        '''Releases open request slot taken by acquire().'''
+        self.open_requests.release()
+
+    def get_stats(self):
+        '''
+        Returns stats on time spent waiting for the rate limiter.
+
+        Returns:
+            dict: Number of requests, total/average/max seconds callers waited.
+        '''
+        with self.lock:
+            return {
+                'request_count': self.request_count,
+                'total_wait_time': self.total_wait_time,
+                'average_wait_time': self.total_wait_time / self.request_count if self.request_count else 0.0,
+                'max_wait_time': self.max_wait_time,
+            }
+
+class IGDBRequestError(Exception):
+    '''Raised when a request to IGDB API fails and a partial result would be mistaken for a complete one.'''
 
 class IGDB:
     '''This is a class to make requests to IGDB API.'''
 
     # Static Properties
 
-    # IGDB access token
+    # Max number of queries allowed in a single multiquery request
+    MULTIQUERY_LIMIT = 10
+
+    # Seconds before access token expires that it is refreshed
+    ACCESS_TOKEN_REFRESH_MARGIN = 60
+
+    # IGDB access token, shared by all instances and threads
     access_token = ''
+    access_token_expires_at = 0
+    access_token_lock = threading.Lock()
 
     # Headers for search request
     headers = {}
 
-    def __init__(self):
-        '''The constructor for IGDB class.'''
+    # Pooled keep-alive session, shared by all instances to reuse connections
+    session = requests.Session()
+    session.mount('https://', requests.adapters.HTTPAdapter(pool_connections=2, pool_maxsize=8))
+
+    # Rate limiter shared by all instances (IGDB allows 4 requests per second and 8 open requests)
+    rate_limiter = RateLimiter(4, 1, 8)
+
+    # Index of normalized platform names/aliases to IGDB platform ID's, shared by all instances
+    platform_index = {}
+    platform_index_loaded = False
+    platform_index_lock = threading.Lock()
+
+    # Results of platform searches for names NOT in platform index (None if search found no platform)
+    platform_search_cache = {}
+
+    def __init__(self, cache = None):
+        '''
+        The constructor for IGDB class.
+
+        Parameters:
+            cache (ResponseCache|None): Cache used to store responses from IGDB API (optional).
+        '''
+        self.cache = cache
+
         # Set static variable for access token, if not already valid.
         IGDB.set_access_token()
-        IGDB.headers = {
-            'Accept': 'application/json',
-            'Client-ID': config('IGDB_CLIENT_ID'),
-            'Authorization': 'Bearer ' + IGDB.access_token
-        }
 
     @staticmethod
-    def set_access_token():
-        # Request access token
-        response = requests.post(
-            'https://id.twitch.tv/oauth2/token',
-            params={
-                'client_id': config('IGDB_CLIENT_ID'),
-                'client_secret': config('IGDB_CLIENT_SECRET'),
-                'grant_type': 'client_credentials'
+    def set_access_token(rejected_headers = None):
+        '''
+        Requests new access token if current access token is missing, about to expire or was rejected.
+
+        Parameters:
+            rejected_headers (dict|None): Headers of request rejected by IGDB API. Token is only refreshed if these are still the current headers, so it is refreshed once when several threads are rejected at the same time.
+        '''
+        with IGDB.access_token_lock:
+            if rejected_headers is None:
+                if IGDB.is_access_token_valid():
+                    return
+            elif rejected_headers is not IGDB.headers:
+                return
+
+            # Request access token
+            response = IGDB.session.post(
+                'https://id.twitch.tv/oauth2/token',
+                params={
+                    'client_id': config('IGDB_CLIENT_ID'),
+                    'client_secret': config('IGDB_CLIENT_SECRET'),
+                    'grant_type': 'client_credentials'
+                }
+            )
+
+            if response.status_code != requests.codes.ok:
+                print('Request failed!')
+                return
+
+            # Set access token and time it expires
+            try:
+                response_data = response.json()
+            except requests.exceptions.JSONDecodeError:
+                print('JSONDecodeError on response from access token request!')
+                return
+
+            IGDB.access_token = response_data['access_token']
+            IGDB.access_token_expires_at = time.time() + response_data.get('expires_in', 0)
+            IGDB.headers = {
+                'Accept': 'application/json',
+                'Client-ID': config('IGDB_CLIENT_ID'),
+                'Authorization': 'Bearer ' + IGDB.access_token
             }
-        )
 
-        if response.status_code != requests.codes.ok:
-            print('Request failed!')
-            return
+    @staticmethod
+    def is_access_token_valid():
+        '''
+        Returns True if access token is set and NOT about to expire.
 
-        # Return access token
-        try:
-            IGDB.access_token = response.json()['access_token']
-        except requests.exceptions.JSONDecodeError:
-            print('JSONDecodeError on response from access token request!')
-            return
+        Returns:
+            bool: True if access token can be used for requests.
+        '''
+        return bool(IGDB.access_token) and time.time() < IGDB.access_token_expires_at - IGDB.ACCESS_TOKEN_REFRESH_MARGIN
 
     def get_platform_data(self, platform_name, fields = '*', exclude = None):
         '''
-        Summary line.
+        Requests data on video game platform using IGDB API.
 
         Parameters:
             platform_name (str): Name of platform to search.
-            fields (str): 
+            fields (str): Fields used for IGDB API request to retrieve specific fields only.
+            exclude (str): Fields used for IGDB API request to exclude specific fields.
 
         Returns:
-            dict|None: Dictionary converted from IGDB JSON response for the platform. 
+            list|None: List converted from IGDB JSON response for the platform search or None if request fails.
         '''
-        # Request details for IGDB
-        #data = 'fields *;search "overblood";'
-        # release_dates for matching platform OR first_release_date
-        data = ' '.join((
-            f'fields {fields};',
-            f'search "{platform_name}";'
-        ))
+        return self.make_request('platforms', IGDB.build_platform_query(platform_name, fields, exclude))
 
-        if exclude is not None:
-            data += f' exclude {exclude};'
+    def make_request(self, endpoint, data, use_cache = True):
+        '''
+        Makes request from IGDB API endpoint using data parameter as attribute in request.
 
-        # Request game based on search
-        response = requests.post(
-            'https://api.igdb.com/v4/platforms', 
-            data=data.encode('utf-8'),
-            headers=IGDB.headers
-        )
+        Parameters:
+            endpoint (str): IGDB API endpoint (ex. 'games', 'platforms', 'multiquery').
+            data (str): Used as data attribute in IGDB request.
+            use_cache (bool): If False, does NOT read or write response cache.
 
-        # Sleep to account for limit of 4 requests per second
-        time.sleep(0.25)
+        Returns:
+            (JSON|None): JSON response from IGDB request or None if request fails.
+        '''
+        use_cache = use_cache and self.cache is not None
+
+        # Return cached response if available
+        if use_cache:
+            cache_key = self.cache.make_key(endpoint, data)
+            response_data = self.cache.get(cache_key)
+            if response_data is not None:
+                return response_data
+
+        for attempt in range(2):
+            # Refresh access token if it is about to expire
+            IGDB.set_access_token()
+            headers = IGDB.headers
+
+            # Wait for rate limiter to account for limit of 4 requests per second
+            with IGDB.rate_limiter:
+                response = IGDB.session.post(
+                    f'https://api.igdb.com/v4/{endpoint}', 
+                    data=data.encode('utf-8'),
+                    headers=headers
+                )
+
+            # If access token was rejected, refresh it and retry once
+            if response.status_code != requests.codes.unauthorized:
+                break
+            IGDB.set_access_token(headers)
 
+        # Check status code from request
         if response.status_code != requests.codes.ok:
-            print('Request failed!')
+            print('Data Sent:')
+            pprint.pprint(data, indent=2)
+            print(f'Request to IGDB API failed with status code: {response.status_code}')
             return None
 
-        # Set respone from game request
+        # Set response from request
         try:
             response_data = response.json()
         except requests.exceptions.JSONDecodeError:
-            print('Converting response to JSON failed!')
+            print('Converting IGDB API response to JSON failed!')
             return None
 
-        if response_data:
-            #print(json.dumps(response_data, sort_keys=True, indent=4))
-            pass
-        else:
-            #print('No search results!')
-            pass
+        if use_cache:
+            self.cache.set(cache_key, response_data)
+
         return response_data
 
     def make_game_request(self, data):
@@ -109,54 +284,201 @@ class IGDB:
             data (str): Used as data attribute in IGDB game request.
 
         Returns:
-            (JSON|None): JSON response from IGDB request or None if request fails.
+            (JSON|None): JSON response from IGDB request or None if request fails or has no results.
         '''
-        # Request game based on search
-        response = requests.post(
-            'https://api.igdb.com/v4/games', 
-            data=data.encode('utf-8'),
-            headers=IGDB.headers
-        )
-
-        # Sleep to account for limit of 4 requests per second
-        time.sleep(0.25)
-
-        # Check status code from request
-        if response.status_code != requests.codes.ok:
-            print('Data Sent:')
-            pprint.pprint(data, indent=2)
-            print(f'Request to IGDB API failed with status code: {response.status_code}')
-            return None
-
-        # Set response from game request
-        try:
-            response_data = response.json()
-        except requests.exceptions.JSONDecodeError:
-            print('Converting IGDB API response to JSON failed!')
-            return None
+        response_data = self.make_request('games', data)
 
         if response_data:
-            # print(json.dumps(response_data[0], sort_keys=True, indent=4))
-            # print(f'No. of entries: {len(response_data)}')
             return response_data
         else:
             return None
 
+    def make_multiquery_request(self, queries):
+        '''
+        Makes requests from IGDB multiquery API, packing up to 10 queries into each request.
+
+        Parameters:
+            queries (list): List of tuples (<endpoint(str)>, <data(str)>) for each query.
+
+        Returns:
+            list: Results for each query in the same order as queries. Each result is a list or None if no results.
+
+        Raises:
+            IGDBRequestError: If request for any chunk of queries fails, since its queries would look like queries without results.
+        '''
+        results = [None] * len(queries)
+
+        for chunk_start in range(0, len(queries), IGDB.MULTIQUERY_LIMIT):
+            chunk_indexes = range(chunk_start, min(chunk_start + IGDB.MULTIQUERY_LIMIT, len(queries)))
+
+            # Name each query by its index to map results back to the caller's input
+            data = ' '.join(
+                f'query {queries[index][0]} "{index}" {{ {queries[index][1]} }};'
+                for index in chunk_indexes
+            )
+
+            response_data = self.make_request('multiquery', data)
+            if response_data is None:
+                raise IGDBRequestError(f'Request for multiquery of queries {chunk_indexes[0]} to {chunk_indexes[-1]} failed.')
+
+            for query_result in response_data:
+                if query_result.get('result'):
+                    results[int(query_result['name'])] = query_result['result']
+
+        return results
+
+    def load_platform_index(self, page_size = 500):
+        '''
+        Loads index of all IGDB platform names and aliases to platform ID's, if not already loaded.
+
+        Parameters:
+            page_size (int): Number of platforms requested per page (max 500).
+
+        Raises:
+            IGDBRequestError: If request for a page fails (index is NOT changed, so it is loaded again on next call).
+
+        Notes:
+        - Platform name has priority over abbreviation, slug and alternative names when two platforms share an alias.
+        '''
+        with IGDB.platform_index_lock:
+            if IGDB.platform_index_loaded:
+                return
+
+            platforms = []
+            offset = 0
+            while True:
+                response_data = self.make_request('platforms', IGDB.build_platform_index_query(page_size, offset))
+                if response_data is None:
+                    raise IGDBRequestError(f'Request for page of platform index at offset {offset} failed.')
+                platforms += response_data
+                if len(response_data) < page_size:
+                    break
+                offset += page_size
+
+            # Index is only set once the last page arrived
+            IGDB.add_platforms_to_index(platforms)
+            IGDB.platform_index_loaded = True
+
+    @staticmethod
+    def add_platforms_to_index(platforms):
+        '''
+        Adds names and aliases of platforms to platform index.
+
+        Parameters:
+            platforms (list): Platform data from IGDB API with fields id, name, abbreviation, alternative_name and slug.
+        '''
+        # Add aliases in order of priority so higher priority aliases are NOT overwritten
+        for alias_keys in (('name',), ('abbreviation', 'slug'), ('alternative_name',)):
+            for platform in platforms:
+                for alias_key in alias_keys:
+                    if not platform.get(alias_key):
+                        continue
+                    for alias in platform[alias_key].split(','):
+                        IGDB.platform_index.setdefault(IGDB.normalize_platform_name(alias), platform['id'])
+
+    def get_platform_id(self, platform_name):
+        '''
+        Returns IGDB platform ID for platform name or alias (ex. 'SNES', 'Super Nintendo', 'PS2').
+
+        Parameters:
+            platform_name (str): Name or alias of platform.
+
+        Returns:
+            int|None: IGDB platform ID or None if no platform is found.
+
+        Raises:
+            IGDBRequestError: If platform index can NOT be loaded or platform search fails.
+        '''
+        self.load_platform_index()
+
+        platform_key = IGDB.normalize_platform_name(platform_name)
+        if platform_key in IGDB.platform_index:
+            return IGDB.platform_index[platform_key]
+        if platform_key in IGDB.platform_search_cache:
+            return IGDB.platform_search_cache[platform_key]
+
+        # Fallback to IGDB platform search, kept apart from platform index so it is NOT searched again
+        platform_data = self.get_platform_data(platform_name, 'id')
+        if platform_data is None:
+            # Failed searches are NOT cached, so they are tried again
+            raise IGDBRequestError(f'Request for platform search of {platform_name} failed.')
+        platform_id = platform_data[0]['id'] if platform_data else None
+        with IGDB.platform_index_lock:
+            IGDB.platform_search_cache[platform_key] = platform_id
+        return platform_id
+
+    @staticmethod
+    def normalize_platform_name(platform_name):
+        '''
+        Returns platform name in lower-case with only letters and numbers, used as key in platform index.
+
+        Parameters:
+            platform_name (str): Name or alias of platform.
+
+        Returns:
+            str: Normalized platform name.
+        '''
+        return re.sub(r'[^a-z0-9]', '', platform_name.lower())
+
+    def get_platform_data_bulk(self, platform_names, fields = '*', exclude = None):
+        '''
+        Requests data on multiple video game platforms using IGDB multiquery API.
+
+        Parameters:
+            platform_names (str[]): Names of platforms to search.
+            fields (str): Fields used for IGDB API request to retrieve specific fields only.
+            exclude (str): Fields used for IGDB API request to exclude specific fields.
+
+        Returns:
+            list: Search results for each platform name in the same order as platform_names (None if no results).
+
+        Raises:
+            IGDBRequestError: If any request to multiquery API fails.
+        '''
+        return self.make_multiquery_request([
+            ('platforms', IGDB.build_platform_query(platform_name, fields, exclude))
+            for platform_name in platform_names
+        ])
+
     def get_game_data_by_id(self, id, fields = '*', exclude = None):
-        ''''
+        '''
         Requests data on video game using IGDB API using the IGDB game ID.
 
-        Paramters:
-            id (int): IGDB video game ID to search.
+        Parameters:
+            id (int|str): IGDB video game ID to search.
             fields (str): Fields used for IGDB API request to retrieve specific fields only.
             exclude (str): Fields used for IGDB API request to exclude specific fields.
+
+        Returns:
+            list|None: JSON response from IGDB request or None if request fails or has no results.
         '''
-        data = ' '.join((f'fields {fields};', f'where id={id};'))
+        return self.make_game_request(IGDB.build_game_by_id_query(id, fields, exclude))
 
-        if exclude is not None:
-            data += f' exclude {exclude};'
+    def get_game_data_by_ids(self, ids, fields = '*', exclude = None, page_size = 500):
+        '''
+        Requests data on video games using IGDB API using IGDB game ID's, one request per page_size ID's.
+
+        Parameters:
+            ids (iterable): IGDB video game ID's to search.
+            fields (str): Fields used for IGDB API request to retrieve specific fields only.
+            exclude (str): Fields used for IGDB API request to exclude specific fields.
+            page_size (int): Max number of ID's requested per request (max 500).
+
+        Returns:
+            dict: Game data keyed by ID (ID's with no results are NOT included).
 
-        return self.make_game_request(data)
+        Raises:
+            IGDBRequestError: If request for any chunk of ID's fails.
+        '''
+        games = {}
+        for chunk in IGDB.chunk_ids(ids, page_size):
+            # Failed request is NOT the same as no results, so a missing chunk is NOT mistaken for ID's without games
+            response_data = self.make_request('games', IGDB.build_game_by_id_query(chunk, fields, exclude, page_size))
+            if response_data is None:
+                raise IGDBRequestError(f"Request for games with ID's {chunk[0]} to {chunk[-1]} ({len(chunk)} ID's) failed.")
+            for game in response_data:
+                games[game['id']] = game
+        return games
 
     def get_game_data(self, name, platform = None, year_released = None, fields = '*', exclude = None):
         '''
@@ -181,12 +503,210 @@ class IGDB:
             # Try converting string to int
             try:
                 platform = int(platform)
-            # If not number, try to use API to get platform ID
+            # If not number, use platform index to get platform ID
             except ValueError:
-                platform = self.get_platform_data(platform)[0]['id']
+                platform = self.get_platform_id(platform)
             except:
                 platform = None
 
+        return self.make_game_request(IGDB.build_game_query(name, platform, year_released, fields, exclude))
+
+    def iterate_endpoint(self, endpoint = 'games', fields = '*', where = None, exclude = None, page_size = 500, use_offset = False, checkpoint_path = None):
+        '''
+        Yields every record from IGDB API endpoint one at a time, requesting one page at a time.
+
+        Parameters:
+            endpoint (str): IGDB API endpoint (ex. 'games', 'platforms').
+            fields (str): Fields used for IGDB API request to retrieve specific fields only.
+            where (str|None): Filter used for IGDB API request (ex. 'platforms=(4,19)') (optional).
+            exclude (str): Fields used for IGDB API request to exclude specific fields.
+            page_size (int): Number of records requested per page (max 500).
+            use_offset (bool): If True, pages by offset, else pages by ID cursor (where id > <last ID>).
+            checkpoint_path (str|None): Path of JSON file used to resume from the last completed page (optional).
+
+        Yields:
+            dict: Data for each record, sorted by ID.
+
+        Raises:
+            IGDBRequestError: If request for a page fails (records before it were already yielded and checkpointed).
+
+        Notes:
+        - Checkpoint is only updated once every record of a page has been yielded, so resuming may repeat records of an incomplete page but never skips any.
+        - Responses are NOT cached.
+        '''
+        checkpoint = {'last_id': 0, 'offset': 0}
+        if checkpoint_path is not None:
+            try:
+                with open(checkpoint_path, 'r') as infile:
+                    checkpoint.update(json.load(infile))
+            except FileNotFoundError:
+                pass
+
+        # Include id field so ID cursor can be set from each page
+        if fields != '*' and 'id' not in fields.replace(' ', '').split(','):
+            fields += ',id'
+
+        while True:
+            data = f'fields {fields};'
+            if exclude is not None:
+                data += f' exclude {exclude};'
+
+            if use_offset:
+                if where is not None:
+                    data += f' where {where};'
+                data += f' sort id asc; limit {page_size}; offset {checkpoint["offset"]};'
+            else:
+                data += f' where id > {checkpoint["last_id"]}'
+                if where is not None:
+                    data += f' & ({where})'
+                data += f'; sort id asc; limit {page_size};'
+
+            response_data = self.make_request(endpoint, data, use_cache=False)
+            if response_data is None:
+                # Checkpoint is kept at last completed page, so the crawl can be resumed
+                raise IGDBRequestError(f'Request for page of {endpoint} after ID {checkpoint["last_id"]} (offset {checkpoint["offset"]}) failed.')
+            if not response_data:
+                return
+
+            yield from response_data
+
+            checkpoint['last_id'] = response_data[-1]['id']
+            checkpoint['offset'] += len(response_data)
+            if checkpoint_path is not None:
+                # Write to temporary file and replace checkpoint, so a crash while writing does NOT corrupt it
+                temp_path = f'{checkpoint_path}.tmp'
+                with open(temp_path, 'w') as outfile:
+                    json.dump(checkpoint, outfile)
+                os.replace(temp_path, checkpoint_path)
+
+            if len(response_data) < page_size:
+                return
+
+    def get_game_data_bulk(self, games, fields = '*', exclude = None):
+        '''
+        Requests data on multiple video games using IGDB multiquery API.
+
+        Parameters:
+            games (list): List of tuples (<name(str)>, <platform(str|number|None)>, <year_released(str|number|None)>) for each game.
+            fields (str): Fields used for IGDB API request to retrieve specific fields only.
+            exclude (str): Fields used for IGDB API request to exclude specific fields.
+
+        Returns:
+            list: Search results for each game in the same order as games (None if no results).
+
+        Raises:
+            IGDBRequestError: If any request to multiquery API fails, or a platform name can NOT be resolved.
+
+        Notes:
+        - Platform names are resolved to IGDB platform ID's using the local platform index.
+        '''
+        games = [tuple(game) + (None,) * (3 - len(game)) for game in games]
+
+        queries = []
+        for name, platform, year_released in games:
+            if type(platform) is str:
+                platform = int(platform) if platform.isdigit() else self.get_platform_id(platform)
+            queries.append(('games', IGDB.build_game_query(name, platform, year_released, fields, exclude)))
+
+        return self.make_multiquery_request(queries)
+
+    @staticmethod
+    def build_platform_query(platform_name, fields = '*', exclude = None):
+        '''
+        Returns data attribute for IGDB platform search request.
+
+        Parameters:
+            platform_name (str): Name of platform to search.
+            fields (str): Fields used for IGDB API request to retrieve specific fields only.
+            exclude (str): Fields used for IGDB API request to exclude specific fields.
+
+        Returns:
+            str: Data attribute for IGDB request.
+        '''
+        data = ' '.join((
+            f'fields {fields};',
+            f'search "{platform_name}";'
+        ))
+
+        if exclude is not None:
+            data += f' exclude {exclude};'
+
+        return data
+
+    @staticmethod
+    def build_platform_index_query(page_size = 500, offset = 0):
+        '''
+        Returns data attribute for IGDB request of a page of all platforms used to load platform index.
+
+        Parameters:
+            page_size (int): Number of platforms requested per page (max 500).
+            offset (int): Number of platforms to skip.
+
+        Returns:
+            str: Data attribute for IGDB request.
+        '''
+        return f'fields id,name,abbreviation,alternative_name,slug; sort id asc; limit {page_size}; offset {offset};'
+
+    @staticmethod
+    def chunk_ids(ids, chunk_size = 500):
+        '''
+        Returns unique ID's split into lists of at most chunk_size ID's.
+
+        Parameters:
+            ids (iterable): IGDB ID's.
+            chunk_size (int): Max number of ID's in each list.
+
+        Returns:
+            list: Lists of unique ID's in the same order as ids.
+        '''
+        unique_ids = list(dict.fromkeys(int(id) for id in ids))
+        return [unique_ids[index:(index + chunk_size)] for index in range(0, len(unique_ids), chunk_size)]
+
+    @staticmethod
+    def build_game_by_id_query(id, fields = '*', exclude = None, limit = None):
+        '''
+        Returns data attribute for IGDB game request using the IGDB game ID(s).
+
+        Parameters:
+            id (int|list): IGDB video game ID OR list of IGDB video game ID's to search.
+            fields (str): Fields used for IGDB API request to retrieve specific fields only.
+            exclude (str): Fields used for IGDB API request to exclude specific fields.
+            limit (int|None): Max number of results returned (optional).
+
+        Returns:
+            str: Data attribute for IGDB request.
+        '''
+        if type(id) in (int, str):
+            data = ' '.join((f'fields {fields};', f'where id={id};'))
+        else:
+            # Include id field so results can be matched to requested ID's
+            if fields != '*' and 'id' not in fields.replace(' ', '').split(','):
+                fields += ',id'
+            data = ' '.join((f'fields {fields};', f'where id=({",".join(str(game_id) for game_id in id)});'))
+
+        if exclude is not None:
+            data += f' exclude {exclude};'
+
+        if limit is not None:
+            data += f' limit {limit};'
+
+        return data
+
+    @staticmethod
+    def build_game_query(name, platform = None, year_released = None, fields = '*', exclude = None):
+        '''
+        Returns data attribute for IGDB game search request.
+
+        Parameters:
+            name (str): Video game name to search.
+            platform (number): IGDB ID for specific platform (optional).
+            year_released (str|number): Year the video game was released (optional).
+            fields (str): Fields used for IGDB API request to retrieve specific fields only.
+            exclude (str): Fields used for IGDB API request to exclude specific fields.
+
+        Returns:
+            str: Data attribute for IGDB request.
+        '''
         # Request details for IGDB
         #data = 'fields *;search "overblood";'
         # release_dates for matching platform OR first_release_date
@@ -216,10 +736,10 @@ class IGDB:
                 data += f' where release_dates.y={year_released};'
         # Else both platform and year_released have value None, do nothing
 
-        return self.make_game_request(data)
+        return data
 
 def main():
-    igdb = IGDB()
+    igdb = IGDB(ResponseCache())
     fields = 'artworks.*,collection.*,cover.*,first_release_date,genres.*,franchise.*,franchises.*,id,involved_companies.*,involved_companies.company.*,involved_companies.company.logo.*,involved_companies.company.websites.*,keywords.*,name,platforms.*,platforms.platform_logo.*,platforms.websites.*,release_dates.*,release_dates.platform.*,release_dates.platform.platform_logo.*,release_dates.platform.websites.*,screenshots.*,slug,storyline,summary,themes.*,url,videos.*,websites.*'
     exclude = 'collection.games,franchise.games,franchises.games,involved_companies.company.published, involved_companies.company.developed'
     
@@ -0,0 +1,428 @@
+import asyncio
+import time
+import pprint
+
+import httpx
+
+from igdb import IGDB, IGDBRequestError
+
+class AsyncRateLimiter:
+    '''Token bucket for asyncio used to keep requests under an API rate limit.'''
+
+    def __init__(self, rate = 4, burst = 1, max_open_requests = 8):
+        '''
+        The constructor for AsyncRateLimiter class.
+
+        Parameters:
+            rate (number): Number of requests allowed per second.
+            burst (number): Max number of tokens the bucket can hold at once.
+            max_open_requests (int): Max number of requests allowed to be open at the same time.
+        '''
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.last_refill = time.monotonic()
+        self.lock = asyncio.Lock()
+        self.open_requests = asyncio.Semaphore(max_open_requests)
+
+        # Stats
+        self.request_count = 0
+        self.total_wait_time = 0.0
+        self.max_wait_time = 0.0
+
+    async def __aenter__(self):
+        return await self.acquire()
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        self.release()
+
+    async def acquire(self):
+        '''
+        Waits until an open request slot and a token are both available.
+
+        Returns:
+            float: Seconds the caller waited before being allowed to make the request.
+        '''
+        start = time.monotonic()
+        await self.open_requests.acquire()
+
+        # Open request slot is released if waiting for a token is cancelled (ex. by asyncio.wait_for()), so it is NOT lost
+        try:
+            # Lock is held while sleeping so tokens are handed out in the order callers arrived
+            async with self.lock:
+                while True:
+                    now = time.monotonic()
+                    # Refill tokens based on time passed since last refill
+                    self.tokens = min(self.burst, self.tokens + (now - self.last_refill) * self.rate)
+                    self.last_refill = now
+
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        break
+
+                    # Wait until next token is available
+                    await asyncio.sleep((1 - self.tokens) / self.rate)
+        except BaseException:
+            self.open_requests.release()
+            raise
+
+        wait_time = time.monotonic() - start
+        self.request_count += 1
+        self.total_wait_time += wait_time
+        self.max_wait_time = max(self.max_wait_time, wait_time)
+        return wait_time
+
+    def release(self):
+        '''Releases open request slot taken by acquire().'''
+        self.open_requests.release()
+
+    def get_stats(self):
+        '''
+        Returns stats on time spent waiting for the rate limiter.
+
+        Returns:
+            dict: Number of requests, total/average/max seconds callers waited.
+        '''
+        return {
+            'request_count': self.request_count,
+            'total_wait_time': self.total_wait_time,
+            'average_wait_time': self.total_wait_time / self.request_count if self.request_count else 0.0,
+            'max_wait_time': self.max_wait_time,
+        }
+
+class AsyncSharedRateLimiter:
+    '''Async interface to a thread-safe RateLimiter, so async and sync clients using it share the same limits.'''
+
+    # Seconds between checks for an open request slot, since the slot is held by a thread-safe semaphore
+    OPEN_REQUEST_POLL_INTERVAL = 0.01
+
+    def __init__(self, rate_limiter):
+        '''
+        The constructor for AsyncSharedRateLimiter class.
+
+        Parameters:
+            rate_limiter (RateLimiter): Thread-safe rate limiter shared with other clients (ex. IGDB.rate_limiter).
+        '''
+        self.rate_limiter = rate_limiter
+
+    async def __aenter__(self):
+        return await self.acquire()
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        self.release()
+
+    async def acquire(self):
+        '''
+        Waits until an open request slot and a token are both available, without blocking the event loop.
+
+        Returns:
+            float: Seconds the caller waited before being allowed to make the request.
+        '''
+        start = time.monotonic()
+        while not self.rate_limiter.open_requests.acquire(blocking=False):
+            await asyncio.sleep(AsyncSharedRateLimiter.OPEN_REQUEST_POLL_INTERVAL)
+
+        # Open request slot is shared with other clients, so it is released if waiting for a token is cancelled
+        try:
+            while True:
+                is_taken, seconds = self.rate_limiter.try_take_token(start)
+                if is_taken:
+                    return seconds
+                await asyncio.sleep(seconds)
+        except BaseException:
+            self.rate_limiter.release()
+            raise
+
+    def release(self):
+        '''Releases open request slot taken by acquire().'''
+        self.rate_limiter.release()
+
+    def get_stats(self):
+        '''
+        Returns stats on time spent waiting for the shared rate limiter (including other clients).
+
+        Returns:
+            dict: Number of requests, total/average/max seconds callers waited.
+        '''
+        return self.rate_limiter.get_stats()
+
+class AsyncIGDB:
+    '''This is a class to make non-blocking requests to IGDB API using asyncio.'''
+
+    # Static Properties
+
+    # Rate limiter shared by all instances and with IGDB class (IGDB allows 4 requests per second and 8 open requests)
+    rate_limiter = AsyncSharedRateLimiter(IGDB.rate_limiter)
+
+    def __init__(self, cache = None, base_url = 'https://api.igdb.com/v4', headers = None, rate_limiter = None):
+        '''
+        The constructor for AsyncIGDB class.
+
+        Parameters:
+            cache (ResponseCache|None): Cache used to store responses from IGDB API (optional).
+            base_url (str): Base URL of IGDB API (ex. URL of local stub server for testing).
+            headers (dict|None): Headers for requests. If None, uses access token shared with IGDB class.
+            rate_limiter (AsyncRateLimiter|AsyncSharedRateLimiter|None): Rate limiter for requests. If None, uses limiter shared by all instances and IGDB class.
+        '''
+        self.cache = cache
+        self.headers = headers
+        self.rate_limiter = rate_limiter if rate_limiter is not None else AsyncIGDB.rate_limiter
+        self.client = httpx.AsyncClient(
+            base_url=base_url,
+            limits=httpx.Limits(max_connections=8, max_keepalive_connections=8)
+        )
+        self.platform_index_lock = asyncio.Lock()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def close(self):
+        '''Closes connections of HTTP client.'''
+        await self.client.aclose()
+
+    async def get_headers(self):
+        '''
+        Returns headers for request, refreshing shared access token in a thread if it is about to expire.
+
+        Returns:
+            dict: Headers for IGDB API request.
+        '''
+        if self.headers is not None:
+            return self.headers
+
+        if not IGDB.is_access_token_valid():
+            await asyncio.to_thread(IGDB.set_access_token)
+        return IGDB.headers
+
+    async def make_request(self, endpoint, data):
+        '''
+        Makes request from IGDB API endpoint using data parameter as attribute in request.
+
+        Parameters:
+            endpoint (str): IGDB API endpoint (ex. 'games', 'platforms', 'multiquery').
+            data (str): Used as data attribute in IGDB request.
+
+        Returns:
+            (JSON|None): JSON response from IGDB request or None if request fails.
+        '''
+        # Return cached response if available
+        if self.cache is not None:
+            cache_key = self.cache.make_key(endpoint, data)
+            response_data = self.cache.get(cache_key)
+            if response_data is not None:
+                return response_data
+
+        for attempt in range(2):
+            headers = await self.get_headers()
+
+            # Wait for rate limiter to account for limit of 4 requests per second
+            try:
+                async with self.rate_limiter:
+                    response = await self.client.post(
+                        f'/{endpoint}',
+                        content=data.encode('utf-8'),
+                        headers=headers
+                    )
+            except httpx.HTTPError as error:
+                print(f'Request to IGDB API failed with error: {error}')
+                return None
+
+            # If shared access token was rejected, refresh it and retry once
+            if response.status_code != httpx.codes.UNAUTHORIZED or self.headers is not None:
+                break
+            await asyncio.to_thread(IGDB.set_access_token, headers)
+
+        # Check status code from request
+        if response.status_code != httpx.codes.OK:
+            print('Data Sent:')
+            pprint.pprint(data, indent=2)
+            print(f'Request to IGDB API failed with status code: {response.status_code}')
+            return None
+
+        # Set response from request
+        try:
+            response_data = response.json()
+        except ValueError:
+            print('Converting IGDB API response to JSON failed!')
+            return None
+
+        if self.cache is not None:
+            self.cache.set(cache_key, response_data)
+
+        return response_data
+
+    async def make_game_request(self, data):
+        '''
+        Makes request from IGDB game API using data parameter as attribute in request.
+
+        Parameters:
+            data (str): Used as data attribute in IGDB game request.
+
+        Returns:
+            (JSON|None): JSON response from IGDB request or None if request fails or has no results.
+        '''
+        response_data = await self.make_request('games', data)
+
+        if response_data:
+            return response_data
+        else:
+            return None
+
+    async def get_platform_data(self, platform_name, fields = '*', exclude = None):
+        '''
+        Requests data on video game platform using IGDB API.
+
+        Parameters:
+            platform_name (str): Name of platform to search.
+            fields (str): Fields used for IGDB API request to retrieve specific fields only.
+            exclude (str): Fields used for IGDB API request to exclude specific fields.
+
+        Returns:
+            list|None: List converted from IGDB JSON response for the platform search or None if request fails.
+        '''
+        return await self.make_request('platforms', IGDB.build_platform_query(platform_name, fields, exclude))
+
+    async def load_platform_index(self, page_size = 500):
+        '''
+        Loads index of all IGDB platform names and aliases to platform ID's, if not already loaded.
+
+        Parameters:
+            page_size (int): Number of platforms requested per page (max 500).
+
+        Raises:
+            IGDBRequestError: If request for a page fails (index is NOT changed, so it is loaded again on next call).
+
+        Notes:
+        - Index is shared with IGDB class.
+        '''
+        async with self.platform_index_lock:
+            if IGDB.platform_index_loaded:
+                return
+
+            platforms = []
+            offset = 0
+            while True:
+                response_data = await self.make_request('platforms', IGDB.build_platform_index_query(page_size, offset))
+                if response_data is None:
+                    raise IGDBRequestError(f'Request for page of platform index at offset {offset} failed.')
+                platforms += response_data
+                if len(response_data) < page_size:
+                    break
+                offset += page_size
+
+            # Sync IGDB class may be loading the index in another thread at the same time
+            with IGDB.platform_index_lock:
+                if not IGDB.platform_index_loaded:
+                    IGDB.add_platforms_to_index(platforms)
+                    IGDB.platform_index_loaded = True
+
+    async def get_platform_id(self, platform_name):
+        '''
+        Returns IGDB platform ID for platform name or alias (ex. 'SNES', 'Super Nintendo', 'PS2').
+
+        Parameters:
+            platform_name (str): Name or alias of platform.
+
+        Returns:
+            int|None: IGDB platform ID or None if no platform is found.
+
+        Raises:
+            IGDBRequestError: If platform index can NOT be loaded or platform search fails.
+        '''
+        await self.load_platform_index()
+
+        platform_key = IGDB.normalize_platform_name(platform_name)
+        if platform_key in IGDB.platform_index:
+            return IGDB.platform_index[platform_key]
+        if platform_key in IGDB.platform_search_cache:
+            return IGDB.platform_search_cache[platform_key]
+
+        # Fallback to IGDB platform search, kept apart from platform index so it is NOT searched again
+        platform_data = await self.get_platform_data(platform_name, 'id')
+        if platform_data is None:
+            # Failed searches are NOT cached, so they are tried again
+            raise IGDBRequestError(f'Request for platform search of {platform_name} failed.')
+        platform_id = platform_data[0]['id'] if platform_data else None
+        IGDB.platform_search_cache[platform_key] = platform_id
+        return platform_id
+
+    async def get_game_data_by_id(self, id, fields = '*', exclude = None):
+        '''
+        Requests data on video game using IGDB API using the IGDB game ID.
+
+        Parameters:
+            id (int|str): IGDB video game ID to search.
+            fields (str): Fields used for IGDB API request to retrieve specific fields only.
+            exclude (str): Fields used for IGDB API request to exclude specific fields.
+
+        Returns:
+            list|None: JSON response from IGDB request or None if request fails or has no results.
+        '''
+        return await self.make_game_request(IGDB.build_game_by_id_query(id, fields, exclude))
+
+    async def get_game_data_by_ids(self, ids, fields = '*', exclude = None, page_size = 500):
+        '''
+        Requests data on video games using IGDB API using IGDB game ID's, making requests for all chunks of ID's concurrently.
+
+        Parameters:
+            ids (iterable): IGDB video game ID's to search.
+            fields (str): Fields used for IGDB API request to retrieve specific fields only.
+            exclude (str): Fields used for IGDB API request to exclude specific fields.
+            page_size (int): Max number of ID's requested per request (max 500).
+
+        Returns:
+            dict: Game data keyed by ID (ID's with no results are NOT included).
+
+        Raises:
+            IGDBRequestError: If request for any chunk of ID's fails.
+        '''
+        # Request all chunks of ID's concurrently
+        chunks = IGDB.chunk_ids(ids, page_size)
+        responses = await asyncio.gather(*(
+            self.make_request('games', IGDB.build_game_by_id_query(chunk, fields, exclude, page_size))
+            for chunk in chunks
+        ))
+
+        games = {}
+        for chunk, response_data in zip(chunks, responses):
+            if response_data is None:
+                raise IGDBRequestError(f"Request for games with ID's {chunk[0]} to {chunk[-1]} ({len(chunk)} ID's) failed.")
+            for game in response_data:
+                games[game['id']] = game
+        return games
+
+    async def get_game_data(self, name, platform = None, year_released = None, fields = '*', exclude = None):
+        '''
+        Requests data on video game using IGDB API.
+
+        Parameters:
+            name (str): Video game name to search.
+            platform (str|number): Video game platform string OR IGDB ID for specific platform (optional).
+            year_released (str|number): Year the video game was released (optional).
+            fields (str): Fields used for IGDB API request to retrieve specific fields only.
+            exclude (str): Fields used for IGDB API request to exclude specific fields.
+
+        Returns:
+            list|None: JSON response from IGDB request or None if request fails or has no results.
+        '''
+        # If platform is string, try converting to int, else use platform index to get platform ID
+        if type(platform) is str:
+            platform = int(platform) if platform.isdigit() else await self.get_platform_id(platform)
+
+        return await self.make_game_request(IGDB.build_game_query(name, platform, year_released, fields, exclude))
+
+async def main():
+    async with AsyncIGDB() as igdb:
+        games = await asyncio.gather(
+            igdb.get_game_data('Goldeneye 007', 'Nintendo 64', fields='id,name'),
+            igdb.get_game_data('Rayman', 'PlayStation', fields='id,name'),
+            igdb.get_game_data('Metal Gear Solid 3: Snake Eater', 'PS2', 2004, fields='id,name'),
+        )
+        pprint.pprint(games, indent=2)
+        pprint.pprint(igdb.rate_limiter.get_stats(), indent=2)
+
+if __name__ == '__main__':
+    asyncio.run(main())
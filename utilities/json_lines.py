@@ -0,0 +1,36 @@
+import json
+
+def write_json_lines(records, path, mode = 'w'):
+    '''
+    Writes each record to file as newline-delimited JSON as it arrives, so records are never all held in memory.
+
+    Parameters:
+        records (iterable): JSON serializable records (ex. generator)
+        path (str): Path of file to write
+        mode (str): File mode ('w' to overwrite, 'a' to append)
+
+    Returns:
+        int: Number of records written
+    '''
+    count = 0
+    with open(path, mode, encoding='utf-8') as outfile:
+        for record in records:
+            outfile.write(json.dumps(record, separators=(',', ':')))
+            outfile.write('\n')
+            count += 1
+    return count
+
+def read_json_lines(path):
+    '''
+    Yields each record from newline-delimited JSON file one at a time.
+
+    Parameters:
+        path (str): Path of file to read
+
+    Yields:
+        (JSON): Record from each non-empty line of file
+    '''
+    with open(path, 'r', encoding='utf-8') as infile:
+        for line in infile:
+            if line.strip():
+                yield json.loads(line)
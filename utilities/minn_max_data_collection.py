@@ -2,7 +2,13 @@ import json
 import pprint
 import re
 import datetime
+import hashlib
+import mmap
+import os
+from concurrent.futures import ProcessPoolExecutor
 from youtube import YouTube
+from json_lines import write_json_lines
+from video_store import VideoStore
 
 # (<show_title(str)>, <regex_pattern(raw_str)> <check_description(bool)>)
 MINN_MAX_SHOW_TITLES = (
@@ -32,6 +38,270 @@ MINN_MAX_SHOW_TITLES = (
     ('Twilight Highlight Zone', None, False),
 )
 
+class ShowTitleClassifier:
+    '''Prebuilt classifier that matches a video to a show in a single pass over the show title rules.'''
+
+    def __init__(self, show_titles = MINN_MAX_SHOW_TITLES):
+        '''
+        Constructor for ShowTitleClassifier class.
+
+        Parameters:
+            show_titles (tuple): Tuples of (<show_title(str)>, <regex_pattern(raw_str)>, <check_description(bool)>) in order of priority
+        '''
+        # Compile regex patterns and upper-case show titles once, keeping order of priority
+        self.rules = [
+            (
+                show_title,
+                re.compile(regex_pattern).search if regex_pattern is not None else None,
+                show_title.upper(),
+                do_check_description
+            )
+            for show_title, regex_pattern, do_check_description in show_titles
+        ]
+
+        # Version of each rule is hash of every rule up to and including it, so a video classified by a rule
+        # only needs to be classified again if that rule or a rule with higher priority changes
+        self.rule_versions = []
+        rules_hash = hashlib.sha256()
+        for show_title, regex_pattern, do_check_description in show_titles:
+            rules_hash.update(repr((show_title, regex_pattern, do_check_description)).encode('utf-8'))
+            self.rule_versions.append(rules_hash.hexdigest()[:16])
+
+        # Version of videos that do NOT match any show depends on every rule (also used as version of whole table)
+        rules_hash.update(b'Other')
+        self.version = rules_hash.hexdigest()[:16]
+
+    def get_versions(self):
+        '''
+        Returns every classifier version a video can be classified with by this classifier.
+
+        Returns:
+            list: Version of each rule and version for videos that do NOT match any show
+        '''
+        return self.rule_versions + [self.version]
+
+    def get_rule_index(self, title, description = ''):
+        '''
+        Returns index of the first rule, in order of priority, that matches the video title or description.
+
+        Parameters:
+            title (str): Title of video
+            description (str): Description of video (only searched for rules with check_description)
+
+        Returns:
+            int|None: Index of rule or None if no rule matches
+        '''
+        # Title and description are only upper-cased once per video
+        upper_title = title.upper()
+        upper_description = None
+
+        for index, (show_title, regex_search, upper_show_title, do_check_description) in enumerate(self.rules):
+            # If regex pattern is NOT None, search using regex pattern
+            if regex_search is not None:
+                if regex_search(title) or (do_check_description and regex_search(description)):
+                    return index
+            # Else search using show title (case-insensitive)
+            else:
+                if upper_show_title in upper_title:
+                    return index
+                if do_check_description:
+                    if upper_description is None:
+                        upper_description = description.upper()
+                    if upper_show_title in upper_description:
+                        return index
+
+        return None
+
+    def classify(self, title, description = ''):
+        '''
+        Returns show title of the first rule, in order of priority, that matches the video title or description.
+
+        Parameters:
+            title (str): Title of video
+            description (str): Description of video (only searched for rules with check_description)
+
+        Returns:
+            str|None: Show title or None if no rule matches
+        '''
+        index = self.get_rule_index(title, description)
+        return self.rules[index][0] if index is not None else None
+
+    def classify_with_version(self, title, description = ''):
+        '''
+        Returns show title and classifier version of the first rule that matches the video title or description.
+
+        Parameters:
+            title (str): Title of video
+            description (str): Description of video (only searched for rules with check_description)
+
+        Returns:
+            tuple: (<show_title(str|None)>, <classifier_version(str)>)
+        '''
+        index = self.get_rule_index(title, description)
+        if index is None:
+            return None, self.version
+        return self.rules[index][0], self.rule_versions[index]
+
+def classify_videos(all_videos_data, classifier = None):
+    '''
+    Returns videos grouped by show.
+
+    Parameters:
+        all_videos_data (iterable): Video data from YouTube Data API videos list method
+        classifier (ShowTitleClassifier|None): Classifier used for each video (uses MINN_MAX_SHOW_TITLES if None)
+
+    Returns:
+        dict: List of videos for each show title, with key 'Other' for videos that do NOT match any show
+    '''
+    if classifier is None:
+        classifier = ShowTitleClassifier(MINN_MAX_SHOW_TITLES)
+
+    matches = {'Other': []}
+    for show_title, _, _, _ in classifier.rules:
+        matches[show_title] = []
+
+    for video_data in all_videos_data:
+        title_to_search = video_data['snippet']['title']
+        description_to_search = video_data['snippet']['description']
+        show_title = classifier.classify(title_to_search, description_to_search)
+        # If no match, append to 'Other'
+        matches[show_title if show_title is not None else 'Other'].append({
+            'title': title_to_search, 
+            'description': description_to_search, 
+            'published_at': datetime.datetime.strptime(video_data['snippet']['publishedAt'], '%Y-%m-%dT%H:%M:%SZ').timestamp(),
+        })
+
+    return matches
+
+def merge_matches(matches_list):
+    '''
+    Returns videos grouped by show, merged from results of classify_videos() in the order given.
+
+    Parameters:
+        matches_list (iterable): Results of classify_videos() for each chunk of videos, in order of chunks
+
+    Returns:
+        dict: List of videos for each show title, with key 'Other' for videos that do NOT match any show
+    '''
+    merged_matches = {}
+    for matches in matches_list:
+        for show_title, videos in matches.items():
+            merged_matches.setdefault(show_title, []).extend(videos)
+    return merged_matches
+
+def classify_videos_chunk(all_videos_data, show_titles = MINN_MAX_SHOW_TITLES):
+    '''
+    Returns videos grouped by show, building classifier in worker process.
+
+    Parameters:
+        all_videos_data (list): Video data from YouTube Data API videos list method
+        show_titles (tuple): Show title rules used to build classifier
+
+    Returns:
+        dict: List of videos for each show title, with key 'Other' for videos that do NOT match any show
+    '''
+    return classify_videos(all_videos_data, ShowTitleClassifier(show_titles))
+
+def classify_videos_parallel(all_videos_data, max_workers = None, chunk_size = 5000, show_titles = MINN_MAX_SHOW_TITLES):
+    '''
+    Returns videos grouped by show, classifying chunks of videos in a process pool.
+
+    Parameters:
+        all_videos_data (list): Video data from YouTube Data API videos list method
+        max_workers (int|None): Number of processes (number of CPUs if None)
+        chunk_size (int): Number of videos classified by each task
+        show_titles (tuple): Show title rules used to build classifier
+
+    Returns:
+        dict: List of videos for each show title in the same order as all_videos_data, with key 'Other' for videos that do NOT match any show
+    '''
+    chunks = [all_videos_data[index:(index + chunk_size)] for index in range(0, len(all_videos_data), chunk_size)]
+    if not chunks:
+        return classify_videos([], ShowTitleClassifier(show_titles))
+
+    # Map returns results in the same order as chunks, so merged order is deterministic
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        return merge_matches(executor.map(classify_videos_chunk, chunks, [show_titles] * len(chunks)))
+
+def get_json_lines_ranges(path, chunk_size = 8 * 1024 * 1024):
+    '''
+    Returns byte ranges of newline-delimited JSON file, each ending at the end of a line.
+
+    Parameters:
+        path (str): Path of newline-delimited JSON file
+        chunk_size (int): Approximate number of bytes in each range
+
+    Returns:
+        list: Tuples of (<start(int)>, <end(int)>) byte offsets
+    '''
+    file_size = os.path.getsize(path)
+    if file_size == 0:
+        return []
+
+    ranges = []
+    with open(path, 'rb') as infile, mmap.mmap(infile.fileno(), 0, access=mmap.ACCESS_READ) as mapped_file:
+        start = 0
+        while start < file_size:
+            end = mapped_file.find(b'\n', min(start + chunk_size, file_size) - 1)
+            end = file_size if end == -1 else end + 1
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+def classify_json_lines_range(path, start, end, show_titles = MINN_MAX_SHOW_TITLES):
+    '''
+    Returns videos in byte range of memory-mapped newline-delimited JSON file grouped by show.
+
+    Parameters:
+        path (str): Path of newline-delimited JSON file of video data
+        start (int): Byte offset of first line in range
+        end (int): Byte offset after last line in range
+        show_titles (tuple): Show title rules used to build classifier
+
+    Returns:
+        dict: List of videos for each show title, with key 'Other' for videos that do NOT match any show
+    '''
+    with open(path, 'rb') as infile, mmap.mmap(infile.fileno(), 0, access=mmap.ACCESS_READ) as mapped_file:
+        def iterate_videos_data():
+            line_start = start
+            while line_start < end:
+                line_end = mapped_file.find(b'\n', line_start, end)
+                if line_end == -1:
+                    line_end = end
+                line = mapped_file[line_start:line_end]
+                if line.strip():
+                    yield json.loads(line)
+                line_start = line_end + 1
+
+        return classify_videos(iterate_videos_data(), ShowTitleClassifier(show_titles))
+
+def classify_json_lines_parallel(path, max_workers = None, chunk_size = 8 * 1024 * 1024, show_titles = MINN_MAX_SHOW_TITLES):
+    '''
+    Returns videos in newline-delimited JSON file grouped by show, classifying byte ranges of the memory-mapped file in a process pool.
+
+    Parameters:
+        path (str): Path of newline-delimited JSON file of video data (ex. output of write_video_data_to_json_lines())
+        max_workers (int|None): Number of processes (number of CPUs if None)
+        chunk_size (int): Approximate number of bytes classified by each task
+        show_titles (tuple): Show title rules used to build classifier
+
+    Returns:
+        dict: List of videos for each show title in the same order as the file, with key 'Other' for videos that do NOT match any show
+    '''
+    ranges = get_json_lines_ranges(path, chunk_size)
+    if not ranges:
+        return classify_videos([], ShowTitleClassifier(show_titles))
+
+    # Only path and offsets are sent to each process, which maps the file itself
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        return merge_matches(executor.map(
+            classify_json_lines_range,
+            [path] * len(ranges),
+            [start for start, _ in ranges],
+            [end for _, end in ranges],
+            [show_titles] * len(ranges)
+        ))
+
 def write_playlist_items_to_json(youtube_inst):
     # YouTube Channel ID: UCiUhKqsBH-Is2VeC2sykEfg
     # Uploads Playlist ID: UUiUhKqsBH-Is2VeC2sykEfg
@@ -54,56 +324,180 @@ def convert_playlist_items_json_to_video_data_json(youtube_inst):
     with open('utilities/minn_max_video_data.json', 'w') as outfile:
         json.dump(new_videos_data, outfile, indent=2)
 
+def write_video_data_to_json_lines(youtube_inst):
+    '''
+    Writes data of every video in uploads playlist to newline-delimited JSON file as each page arrives.
+
+    Parameters:
+        youtube_inst (YouTube): Instance of YouTube class used to make requests
+
+    Returns:
+        int: Number of videos written
+    '''
+    # YouTube Channel ID: UCiUhKqsBH-Is2VeC2sykEfg
+    # Uploads Playlist ID: UUiUhKqsBH-Is2VeC2sykEfg
+    playlist_items = youtube_inst.iterate_video_data_from_playlist('UUiUhKqsBH-Is2VeC2sykEfg', param='contentDetails')
+    video_ids = (playlist_item['contentDetails']['videoId'] for playlist_item in playlist_items)
+    video_data = youtube_inst.iterate_video_data_from_video_id_list(video_ids, max_workers=8)
+
+    num_videos = write_json_lines(video_data, 'utilities/minn_max_video_data.ndjson')
+    print(f'Videos In List: {num_videos}')
+    return num_videos
+
+def sync_playlist_items_to_json(youtube_inst):
+    '''
+    Adds data of new or changed videos in uploads playlist to video data JSON file, without re-downloading known videos.
+
+    Parameters:
+        youtube_inst (YouTube): Instance of YouTube class used to make requests
+
+    Returns:
+        list: Video data of each new or changed video
+    '''
+    # Load ETags from previous sync
+    try:
+        with open('utilities/minn_max_playlist_sync_state.json', 'r') as infile:
+            sync_state = json.load(infile)
+    except FileNotFoundError:
+        sync_state = {'etag': None, 'items': {}}
+
+    # Load previously collected video data
+    try:
+        with open('utilities/minn_max_video_data.json', 'r') as infile:
+            all_videos_data = json.load(infile)
+    except FileNotFoundError:
+        all_videos_data = []
+
+    # Videos collected before first sync have unknown playlist item ETag
+    known_item_etags = {video_data['id']: None for video_data in all_videos_data}
+    known_item_etags.update(sync_state['items'])
+
+    # YouTube Channel ID: UCiUhKqsBH-Is2VeC2sykEfg
+    # Uploads Playlist ID: UUiUhKqsBH-Is2VeC2sykEfg
+    playlist_items, sync_state['etag'] = youtube_inst.get_new_video_data_from_playlist(
+        'UUiUhKqsBH-Is2VeC2sykEfg',
+        known_item_etags,
+        sync_state['etag']
+    )
+    print(f'New Or Changed Videos: {len(playlist_items)}')
+
+    new_videos_data = []
+    if playlist_items:
+        # Get video data for new or changed videos only
+        video_id_list = [playlist_item['contentDetails']['videoId'] for playlist_item in playlist_items]
+        new_videos_data = youtube_inst.get_video_data_from_video_id_list(video_id_list, max_workers=8)
+
+        # Add new videos to start of list (newest first), replacing old data of changed videos
+        new_video_ids = set(video_id_list)
+        all_videos_data = new_videos_data + [video_data for video_data in all_videos_data if video_data['id'] not in new_video_ids]
+        with open('utilities/minn_max_video_data.json', 'w') as outfile:
+            json.dump(all_videos_data, outfile, indent=2)
+
+        for playlist_item in playlist_items:
+            sync_state['items'][playlist_item['contentDetails']['videoId']] = playlist_item['etag']
+
+    with open('utilities/minn_max_playlist_sync_state.json', 'w') as outfile:
+        json.dump(sync_state, outfile)
+
+    return new_videos_data
+
+def sync_playlist_items_to_store(youtube_inst, video_store):
+    '''
+    Adds data of new or changed videos in uploads playlist to video store, without re-downloading known videos.
+
+    Parameters:
+        youtube_inst (YouTube): Instance of YouTube class used to make requests
+        video_store (VideoStore): Store of collected video data
+
+    Returns:
+        int: Number of new or changed videos
+    '''
+    # Only load video ID and playlist item ETag of stored videos
+    known_item_etags = {
+        video['video_id']: video['playlist_item_etag']
+        for video in video_store.get_videos(('video_id', 'playlist_item_etag'))
+    }
+
+    # YouTube Channel ID: UCiUhKqsBH-Is2VeC2sykEfg
+    # Uploads Playlist ID: UUiUhKqsBH-Is2VeC2sykEfg
+    playlist_items, playlist_etag = youtube_inst.get_new_video_data_from_playlist(
+        'UUiUhKqsBH-Is2VeC2sykEfg',
+        known_item_etags,
+        video_store.get_metadata('playlist_etag')
+    )
+    print(f'New Or Changed Videos: {len(playlist_items)}')
+
+    if playlist_items:
+        playlist_item_etags = {
+            playlist_item['contentDetails']['videoId']: playlist_item['etag']
+            for playlist_item in playlist_items
+        }
+        video_store.upsert_videos(
+            youtube_inst.iterate_video_data_from_video_id_list(list(playlist_item_etags), max_workers=8),
+            playlist_item_etags
+        )
+
+    video_store.set_metadata('playlist_etag', playlist_etag)
+    return len(playlist_items)
+
+def classify_video_store(video_store, classifier = None, reclassify_all = False):
+    '''
+    Classifies new videos and videos whose rules changed since they were classified, and saves their show in video store.
+
+    Parameters:
+        video_store (VideoStore): Store of collected video data
+        classifier (ShowTitleClassifier|None): Classifier used for each video (uses MINN_MAX_SHOW_TITLES if None)
+        reclassify_all (bool): If True, classifies every stored video
+
+    Returns:
+        list: Delta of classification, dict for each video whose show changed (including new videos)
+    '''
+    if classifier is None:
+        classifier = ShowTitleClassifier(MINN_MAX_SHOW_TITLES)
+
+    # Only load columns needed for classification, for videos NOT classified with a current version
+    videos = video_store.get_videos(
+        ('video_id', 'title', 'description', 'show'),
+        exclude_classifier_versions=None if reclassify_all else classifier.get_versions()
+    )
+
+    video_shows = []
+    delta = []
+    for video in videos:
+        show_title, classifier_version = classifier.classify_with_version(video['title'], video['description'])
+        # Videos that do NOT match any show are saved as 'Other'
+        show_title = show_title or 'Other'
+        video_shows.append((video['video_id'], show_title, classifier_version))
+        if show_title != video['show']:
+            delta.append({
+                'video_id': video['video_id'],
+                'title': video['title'],
+                'show': show_title,
+                'previous_show': video['show'],
+                'classifier_version': classifier_version,
+            })
+
+    video_store.set_shows(video_shows)
+    print(f'Videos Classified: {len(video_shows)}, Shows Changed: {len(delta)}')
+    return delta
+
 def main():
     youtube_inst = YouTube()
+    video_store = VideoStore()
 
     # response = youtube_inst.get_youtube_video_data('nSFdetbQ18M') # Revolution X Replay
     # pprint.pprint(response, indent=2)
 
-    matches = {'Other': []}
-    for show_title in MINN_MAX_SHOW_TITLES:
-            matches[show_title[0]] = []
-
-    with open('utilities/minn_max_video_data.json', 'r') as outfile:
-        all_videos_data = json.load(outfile)
-        for video_data in all_videos_data:
-            title_to_search = video_data['snippet']['title']
-            description_to_search = video_data['snippet']['description']
-            found_match = False
-            for show_title, regex_pattern, do_check_description in MINN_MAX_SHOW_TITLES:
-                # If regex_patters is NOT None, search using regex pattern
-                if regex_pattern is not None:
-                    if re.search(regex_pattern, title_to_search):
-                        found_match = True
-                        break
-                    if do_check_description and re.search(regex_pattern, description_to_search):
-                        found_match = True
-                        break
-                # Else search using show_title
-                elif show_title.upper() in title_to_search.upper():
-                    found_match = True
-                    break
-                elif do_check_description and show_title.upper() in description_to_search:
-                    found_match = True
-                    break
-            dict_to_add = {
-                'title': title_to_search, 
-                'description': description_to_search, 
-                'published_at': datetime.datetime.strptime(video_data['snippet']['publishedAt'], '%Y-%m-%dT%H:%M:%SZ').timestamp(),
-            }
-            # If found_match is still False, append to 'Other'
-            if not found_match:
-                matches['Other'].append(dict_to_add)
-            else:
-                matches[show_title].append(dict_to_add)
-
-        # for val in matches.values():
-        #     val.sort()
+    # Import previously collected JSON file into video store on first run
+    if video_store.count() == 0 and os.path.exists('utilities/minn_max_video_data.json'):
+        with open('utilities/minn_max_video_data.json', 'r') as infile:
+            video_store.upsert_videos(json.load(infile))
 
-        pprint.pprint(matches['Other'], indent=2)
+    # Only new videos and videos whose rules changed are classified, changes are written as a delta
+    delta = classify_video_store(video_store, ShowTitleClassifier(MINN_MAX_SHOW_TITLES))
+    write_json_lines(delta, 'utilities/minn_max_shows_delta.ndjson')
 
-    with open('utilities/minn_max_shows_data.json', 'w+') as outfile:
-        json.dump(matches, outfile, indent=2)
+    pprint.pprint([video['title'] for video in video_store.get_videos(('title',), show='Other')], indent=2)
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -0,0 +1,131 @@
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+
+class ResponseCache:
+    '''On-disk cache for API responses with per-entry TTL and LRU eviction.'''
+
+    def __init__(self, path = 'utilities/api_response_cache.sqlite3', ttl = 60 * 60 * 24 * 7, max_entries = 10000):
+        '''
+        The constructor for ResponseCache class.
+
+        Parameters:
+            path (str): Path of SQLite file used to store responses (':memory:' to keep in memory only).
+            ttl (number): Default seconds before an entry expires.
+            max_entries (int): Max number of entries kept before least recently used entries are evicted.
+        '''
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute('''
+            CREATE TABLE IF NOT EXISTS response_cache (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        ''')
+        self.connection.execute('CREATE INDEX IF NOT EXISTS response_cache_last_access ON response_cache (last_access)')
+        self.connection.commit()
+
+        # Stats
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(endpoint, data):
+        '''
+        Returns cache key for request to endpoint with data as the query body.
+
+        Parameters:
+            endpoint (str): API endpoint of the request.
+            data (str): Query body of the request.
+
+        Returns:
+            str: Hash of endpoint and normalized query body.
+        '''
+        # Normalize whitespace so equivalent queries share the same key
+        normalized_data = re.sub(r'\s*;\s*', ';', re.sub(r'\s+', ' ', data)).strip()
+        return hashlib.sha256(f'{endpoint}\n{normalized_data}'.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        '''
+        Returns cached value for key.
+
+        Parameters:
+            key (str): Cache key returned from make_key().
+
+        Returns:
+            (JSON|None): Cached value or None if key is not cached or has expired.
+        '''
+        now = time.time()
+        with self.lock:
+            row = self.connection.execute(
+                'SELECT value, expires_at FROM response_cache WHERE key = ?', (key,)
+            ).fetchone()
+
+            if row is None or row[1] <= now:
+                if row is not None:
+                    self.connection.execute('DELETE FROM response_cache WHERE key = ?', (key,))
+                    self.connection.commit()
+                self.misses += 1
+                return None
+
+            self.connection.execute('UPDATE response_cache SET last_access = ? WHERE key = ?', (now, key))
+            self.connection.commit()
+            self.hits += 1
+            return json.loads(row[0])
+
+    def set(self, key, value, ttl = None):
+        '''
+        Adds value to cache, evicting least recently used entries if cache is full.
+
+        Parameters:
+            key (str): Cache key returned from make_key().
+            value (JSON): JSON serializable value to cache.
+            ttl (number): Seconds before entry expires (uses default ttl if None).
+        '''
+        now = time.time()
+        expires_at = now + (self.ttl if ttl is None else ttl)
+        with self.lock:
+            self.connection.execute(
+                'INSERT OR REPLACE INTO response_cache (key, value, expires_at, last_access) VALUES (?, ?, ?, ?)',
+                (key, json.dumps(value), expires_at, now)
+            )
+
+            # Evict least recently used entries over max_entries
+            num_entries = self.connection.execute('SELECT COUNT(*) FROM response_cache').fetchone()[0]
+            if num_entries > self.max_entries:
+                cursor = self.connection.execute(
+                    'DELETE FROM response_cache WHERE key IN (SELECT key FROM response_cache ORDER BY last_access LIMIT ?)',
+                    (num_entries - self.max_entries,)
+                )
+                self.evictions += cursor.rowcount
+            self.connection.commit()
+
+    def clear(self):
+        '''Removes all entries from cache.'''
+        with self.lock:
+            self.connection.execute('DELETE FROM response_cache')
+            self.connection.commit()
+
+    def get_stats(self):
+        '''
+        Returns stats on cache usage.
+
+        Returns:
+            dict: Number of hits, misses, evictions and entries currently in cache.
+        '''
+        with self.lock:
+            num_entries = self.connection.execute('SELECT COUNT(*) FROM response_cache').fetchone()[0]
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': num_entries,
+            }
@@ -0,0 +1,372 @@
+import asyncio
+import json
+import os
+import re
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Modules in utilities import each other as scripts (ex. 'from igdb import IGDB')
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from igdb import IGDB, IGDBRequestError, RateLimiter
+from igdb_async import AsyncIGDB, AsyncRateLimiter, AsyncSharedRateLimiter
+from minn_max_data_collection import ShowTitleClassifier
+from response_cache import ResponseCache
+from video_store import VideoStore
+from youtube import YouTube
+
+class StubIGDBServer:
+    '''Local HTTP server answering every request with an empty JSON list, recording when requests start and how many are open.'''
+
+    def __init__(self, response_delay = 0.1):
+        self.response_delay = response_delay
+        self.lock = threading.Lock()
+        self.start_times = []
+        self.open_requests = 0
+        self.max_open_requests = 0
+
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                stub.record_open(1)
+                time.sleep(stub.response_delay)
+                stub.record_open(-1)
+
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', '2')
+                self.end_headers()
+                self.wfile.write(b'[]')
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.server.server_address[1]}'
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def record_open(self, change):
+        with self.lock:
+            if change > 0:
+                self.start_times.append(time.monotonic())
+            self.open_requests += change
+            self.max_open_requests = max(self.max_open_requests, self.open_requests)
+
+class RateLimiterTests(unittest.TestCase):
+    # Fast limits so tests are quick, but slow enough that response delay overlaps requests
+    RATE = 20
+    MAX_OPEN_REQUESTS = 3
+    REQUEST_COUNT = 12
+
+    def assert_within_limits(self, start_times, max_open_requests):
+        self.assertEqual(len(start_times), self.REQUEST_COUNT)
+        self.assertLessEqual(max_open_requests, self.MAX_OPEN_REQUESTS)
+        # With burst of 1, each request after the first waits for a new token
+        start_times = sorted(start_times)
+        self.assertGreaterEqual(start_times[-1] - start_times[0], (self.REQUEST_COUNT - 1) / self.RATE * 0.9)
+
+    def test_rate_limiter_limits_threads(self):
+        rate_limiter = RateLimiter(self.RATE, 1, self.MAX_OPEN_REQUESTS)
+        with StubIGDBServer() as stub:
+            def request():
+                with rate_limiter:
+                    stub.record_open(1)
+                    time.sleep(stub.response_delay)
+                    stub.record_open(-1)
+
+            threads = [threading.Thread(target=request) for _ in range(self.REQUEST_COUNT)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assert_within_limits(stub.start_times, stub.max_open_requests)
+        self.assertEqual(rate_limiter.get_stats()['request_count'], self.REQUEST_COUNT)
+
+    def test_async_rate_limiter_limits_client(self):
+        async def make_requests(url):
+            async with AsyncIGDB(base_url=url, headers={}, rate_limiter=AsyncRateLimiter(self.RATE, 1, self.MAX_OPEN_REQUESTS)) as igdb:
+                return await asyncio.gather(*[igdb.make_request('games', f'where id = {i};') for i in range(self.REQUEST_COUNT)])
+
+        with StubIGDBServer() as stub:
+            responses = asyncio.run(make_requests(stub.url))
+
+        self.assertEqual(responses, [[]] * self.REQUEST_COUNT)
+        self.assert_within_limits(stub.start_times, stub.max_open_requests)
+
+    def test_shared_rate_limiter_limits_sync_and_async_clients_together(self):
+        rate_limiter = RateLimiter(self.RATE, 1, self.MAX_OPEN_REQUESTS)
+        shared_rate_limiter = AsyncSharedRateLimiter(rate_limiter)
+
+        async def make_requests(url, count):
+            async with AsyncIGDB(base_url=url, headers={}, rate_limiter=shared_rate_limiter) as first_igdb, \
+                    AsyncIGDB(base_url=url, headers={}, rate_limiter=shared_rate_limiter) as second_igdb:
+                return await asyncio.gather(*[
+                    (first_igdb if i % 2 else second_igdb).make_request('games', f'where id = {i};') for i in range(count)
+                ])
+
+        with StubIGDBServer() as stub:
+            # Thread makes requests with the sync limiter while async clients make theirs
+            def request():
+                for _ in range(self.REQUEST_COUNT // 3):
+                    with rate_limiter:
+                        stub.record_open(1)
+                        time.sleep(stub.response_delay)
+                        stub.record_open(-1)
+
+            thread = threading.Thread(target=request)
+            thread.start()
+            asyncio.run(make_requests(stub.url, self.REQUEST_COUNT - self.REQUEST_COUNT // 3))
+            thread.join()
+
+        self.assert_within_limits(stub.start_times, stub.max_open_requests)
+
+    def test_cancelled_waiters_release_open_request_slots(self):
+        async def cancel_waiters(rate_limiter):
+            # First caller takes the only token, so the next callers wait for a token while holding a slot
+            await rate_limiter.acquire()
+            for _ in range(3):
+                with self.assertRaises(asyncio.TimeoutError):
+                    await asyncio.wait_for(rate_limiter.acquire(), 0.05)
+            rate_limiter.release()
+
+        async def count_open_request_slots(open_requests):
+            count = 0
+            while not open_requests.locked():
+                await open_requests.acquire()
+                count += 1
+            return count
+
+        async_rate_limiter = AsyncRateLimiter(1, 1, 2)
+        asyncio.run(cancel_waiters(async_rate_limiter))
+        self.assertEqual(asyncio.run(count_open_request_slots(async_rate_limiter.open_requests)), 2)
+
+        rate_limiter = RateLimiter(1, 1, 2)
+        asyncio.run(cancel_waiters(AsyncSharedRateLimiter(rate_limiter)))
+        self.assertTrue(rate_limiter.open_requests.acquire(blocking=False))
+        self.assertTrue(rate_limiter.open_requests.acquire(blocking=False))
+
+    def test_async_clients_share_limiter_of_sync_client_by_default(self):
+        async def get_rate_limiters():
+            async with AsyncIGDB(headers={}) as first_igdb, AsyncIGDB(headers={}) as second_igdb:
+                return first_igdb.rate_limiter, second_igdb.rate_limiter
+
+        first_rate_limiter, second_rate_limiter = asyncio.run(get_rate_limiters())
+        self.assertIs(first_rate_limiter, second_rate_limiter)
+        self.assertIs(first_rate_limiter.rate_limiter, IGDB.rate_limiter)
+
+class ShowTitleClassifierTests(unittest.TestCase):
+    SHOW_TITLES = (
+        ('MinnMax Plays', None, False),
+        ('Everything We Know', r'^Everything\s.+Know', False),
+        ('Plays', None, False),
+        ('MinnMax Show', None, True),
+    )
+
+    def test_first_matching_rule_in_order_of_priority_is_used(self):
+        classifier = ShowTitleClassifier(self.SHOW_TITLES)
+        self.assertEqual(classifier.classify('MinnMax Plays Elden Ring'), 'MinnMax Plays')
+        self.assertEqual(classifier.classify('Leo Plays Elden Ring'), 'Plays')
+        self.assertEqual(classifier.classify('Everything We Want To Know About Zelda'), 'Everything We Know')
+        self.assertIsNone(classifier.classify('Behind The Scenes Of GDC 2022'))
+
+        # Same rules in another order match the lower rule first
+        classifier = ShowTitleClassifier(tuple(reversed(self.SHOW_TITLES)))
+        self.assertEqual(classifier.classify('MinnMax Plays Elden Ring'), 'Plays')
+
+    def test_description_is_only_searched_by_rules_that_check_it(self):
+        classifier = ShowTitleClassifier(self.SHOW_TITLES)
+        self.assertEqual(classifier.classify('Episode 12', 'Welcome to the minnmax show!'), 'MinnMax Show')
+        self.assertIsNone(classifier.classify('Episode 12', 'Everything We Know and MinnMax Plays'))
+        # Title has priority over description of a higher rule
+        self.assertEqual(classifier.classify('Leo Plays Elden Ring', 'Welcome to the MinnMax Show!'), 'Plays')
+
+    def test_rule_version_only_changes_if_rule_or_higher_rule_changes(self):
+        classifier = ShowTitleClassifier(self.SHOW_TITLES)
+        changed_classifier = ShowTitleClassifier(self.SHOW_TITLES[:2] + (('Leo Plays', None, False),) + self.SHOW_TITLES[3:])
+
+        self.assertEqual(changed_classifier.rule_versions[:2], classifier.rule_versions[:2])
+        self.assertNotEqual(changed_classifier.rule_versions[2], classifier.rule_versions[2])
+        self.assertNotEqual(changed_classifier.rule_versions[3], classifier.rule_versions[3])
+        self.assertNotEqual(changed_classifier.version, classifier.version)
+
+        self.assertEqual(classifier.classify_with_version('MinnMax Plays Elden Ring'), ('MinnMax Plays', classifier.rule_versions[0]))
+        self.assertEqual(classifier.classify_with_version('Behind The Scenes'), (None, classifier.version))
+        self.assertEqual(classifier.get_versions(), classifier.rule_versions + [classifier.version])
+
+class ResponseCacheTests(unittest.TestCase):
+    def setUp(self):
+        # Time is set by tests, so expiry and order of access do NOT depend on how fast tests run
+        self.now = 1000.0
+        patcher = mock.patch('response_cache.time.time', lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.response_cache = ResponseCache(':memory:', ttl=60, max_entries=2)
+
+    def test_make_key_ignores_whitespace_of_query(self):
+        self.assertEqual(
+            ResponseCache.make_key('games', 'fields name;  where id = 1;'),
+            ResponseCache.make_key('games', 'fields name ;\nwhere id = 1 ; ')
+        )
+        self.assertNotEqual(ResponseCache.make_key('games', 'fields name;'), ResponseCache.make_key('platforms', 'fields name;'))
+
+    def test_entry_expires_after_ttl(self):
+        self.response_cache.set('default', [1])
+        self.response_cache.set('short', [2], ttl=10)
+
+        self.now += 9
+        self.assertEqual(self.response_cache.get('short'), [2])
+        self.now += 1
+        self.assertIsNone(self.response_cache.get('short'))
+        self.assertEqual(self.response_cache.get('default'), [1])
+        self.now += 50
+        self.assertIsNone(self.response_cache.get('default'))
+
+        self.assertEqual(self.response_cache.get_stats(), {'hits': 2, 'misses': 2, 'evictions': 0, 'entries': 0})
+
+    def test_least_recently_used_entry_is_evicted(self):
+        self.response_cache.set('first', 1)
+        self.now += 1
+        self.response_cache.set('second', 2)
+        self.now += 1
+        # Reading first entry makes second the least recently used
+        self.assertEqual(self.response_cache.get('first'), 1)
+        self.now += 1
+        self.response_cache.set('third', 3)
+
+        self.assertIsNone(self.response_cache.get('second'))
+        self.assertEqual(self.response_cache.get('first'), 1)
+        self.assertEqual(self.response_cache.get('third'), 3)
+        self.assertEqual(self.response_cache.get_stats()['evictions'], 1)
+        self.assertEqual(self.response_cache.get_stats()['entries'], 2)
+
+class MultiqueryTests(unittest.TestCase):
+    PLATFORM_NAMES = [f'Platform {index}' for index in range(12)]
+
+    def make_igdb(self, failed_index = None):
+        # Stub answers each named query with the platform it searched for, except queries for odd platforms which have no results
+        igdb = object.__new__(IGDB)
+        self.requests = []
+
+        def make_request(endpoint, data):
+            self.requests.append(data)
+            queries = re.findall(r'query platforms "(\d+)" \{ fields \*; search "Platform (\d+)"; \};', data)
+            self.assertEqual(len(queries), data.count('query '))
+            if failed_index is not None and str(failed_index) in [name for name, _ in queries]:
+                return None
+            return [
+                {'name': name, 'result': [{'name': f'Platform {number}'}] if int(number) % 2 == 0 else []}
+                for name, number in queries
+            ]
+
+        igdb.make_request = make_request
+        return igdb
+
+    def test_results_are_in_order_of_queries_across_chunks(self):
+        results = self.make_igdb().get_platform_data_bulk(self.PLATFORM_NAMES)
+
+        self.assertEqual(len(self.requests), 2)
+        self.assertEqual(results, [[{'name': f'Platform {index}'}] if index % 2 == 0 else None for index in range(12)])
+
+    def test_failed_chunk_raises(self):
+        with self.assertRaises(IGDBRequestError):
+            self.make_igdb(failed_index=10).get_platform_data_bulk(self.PLATFORM_NAMES)
+
+class GameDataByIdsTests(unittest.TestCase):
+    GAME_IDS = [3, 1, 2, 3]
+
+    @staticmethod
+    def get_stub_response(data, failed_id = None):
+        # Returns game for each requested ID, or None (failed request) if failed_id was requested
+        ids = [int(game_id) for game_id in data.split('where id=(')[1].split(')')[0].split(',')]
+        return None if failed_id in ids else [{'id': game_id, 'name': f'Game {game_id}'} for game_id in ids]
+
+    def test_get_game_data_by_ids_returns_games_keyed_by_id(self):
+        igdb = object.__new__(IGDB)
+        igdb.make_request = lambda endpoint, data: self.get_stub_response(data)
+        games = igdb.get_game_data_by_ids(self.GAME_IDS, page_size=2)
+        self.assertEqual(games, {game_id: {'id': game_id, 'name': f'Game {game_id}'} for game_id in (1, 2, 3)})
+
+    def test_get_game_data_by_ids_raises_if_chunk_fails(self):
+        igdb = object.__new__(IGDB)
+        igdb.make_request = lambda endpoint, data: self.get_stub_response(data, failed_id=2)
+        with self.assertRaises(IGDBRequestError):
+            igdb.get_game_data_by_ids(self.GAME_IDS, page_size=2)
+
+    def test_async_get_game_data_by_ids_raises_if_chunk_fails(self):
+        async def get_games(failed_id):
+            async with AsyncIGDB(headers={}) as igdb:
+                async def make_request(endpoint, data):
+                    return self.get_stub_response(data, failed_id)
+                igdb.make_request = make_request
+                return await igdb.get_game_data_by_ids(self.GAME_IDS, page_size=2)
+
+        self.assertEqual(set(asyncio.run(get_games(None))), {1, 2, 3})
+        with self.assertRaises(IGDBRequestError):
+            asyncio.run(get_games(2))
+
+class NewPlaylistVideosTests(unittest.TestCase):
+    @staticmethod
+    def build_page(video_ids, next_page_token = None):
+        # Playlist item ID's are different from video ID's, like in responses of YouTube Data API
+        page = {
+            'etag': f'page-{next_page_token}',
+            'items': [{'id': f'item-{video_id}', 'etag': f'etag-{video_id}', 'contentDetails': {'videoId': video_id}} for video_id in video_ids],
+        }
+        if next_page_token is not None:
+            page['nextPageToken'] = next_page_token
+        return page
+
+    def get_new_videos(self, pages, known_item_etags):
+        from googleapiclient.http import HttpMockSequence
+
+        http = HttpMockSequence([({'status': '200'}, json.dumps(page)) for page in pages])
+        http.request = mock.Mock(wraps=http.request)
+        with tempfile.TemporaryDirectory() as directory, mock.patch.dict(os.environ, {'YOUTUBE_DEVELOPER_KEY': 'test'}):
+            youtube = YouTube(os.path.join(directory, 'youtube.json'), http)
+            playlist_items, _ = youtube.get_new_video_data_from_playlist('playlist', known_item_etags)
+        return [playlist_item['contentDetails']['videoId'] for playlist_item in playlist_items], http.request.call_count
+
+    def test_paging_continues_until_page_of_only_known_videos(self):
+        pages = [
+            self.build_page(['new1', 'known1'], 'page2'),
+            self.build_page(['new2', 'changed'], 'page3'),
+            self.build_page(['known2', 'known3'], 'page4'),
+            self.build_page(['old'], None),
+        ]
+        known_item_etags = {'known1': 'etag-known1', 'changed': 'etag-old', 'known2': None, 'known3': 'etag-known3'}
+
+        video_ids, request_count = self.get_new_videos(pages, known_item_etags)
+        self.assertEqual(video_ids, ['new1', 'new2', 'changed'])
+        self.assertEqual(request_count, 3)
+
+class VideoStoreTests(unittest.TestCase):
+    def test_get_videos_by_more_ids_than_sqlite_parameter_limit(self):
+        video_store = VideoStore(':memory:')
+        video_store.upsert_videos(
+            {'id': f'video{index}', 'snippet': {'title': f'Video {index}', 'publishedAt': f'2022-01-01T00:{index // 60 % 60:02d}:{index % 60:02d}Z'}}
+            for index in range(100)
+        )
+        # Max number of parameters depends on how SQLite was built, so a low limit is set (999 is the default of older versions)
+        video_store.connection.setlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER, 999)
+        video_ids = [f'video{index}' for index in range(0, 100, 2)] + [f'missing{index}' for index in range(2000)]
+
+        videos = list(video_store.get_videos(('video_id',), video_ids=video_ids, newest_first=False, limit=10))
+        self.assertEqual([video['video_id'] for video in videos], [f'video{index}' for index in range(0, 20, 2)])
@@ -0,0 +1,233 @@
+import json
+import sqlite3
+
+class VideoStore:
+    '''Indexed SQLite store of collected YouTube video data.'''
+
+    # Columns that can be requested with get_videos() ('data' is the full video data from YouTube Data API)
+    COLUMNS = (
+        'video_id',
+        'published_at',
+        'title',
+        'description',
+        'channel_id',
+        'show',
+        'classifier_version',
+        'playlist_item_etag',
+        'data',
+    )
+
+    def __init__(self, path = 'utilities/minn_max_videos.sqlite3'):
+        '''
+        Constructor for VideoStore class.
+
+        Parameters:
+            path (str): Path of SQLite file (':memory:' to keep in memory only)
+        '''
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript('''
+            CREATE TABLE IF NOT EXISTS videos (
+                video_id TEXT PRIMARY KEY,
+                published_at TEXT,
+                title TEXT NOT NULL DEFAULT '',
+                description TEXT NOT NULL DEFAULT '',
+                channel_id TEXT,
+                show TEXT,
+                classifier_version TEXT,
+                playlist_item_etag TEXT,
+                data TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS videos_published_at ON videos (published_at);
+            CREATE INDEX IF NOT EXISTS videos_show_published_at ON videos (show, published_at);
+            CREATE TABLE IF NOT EXISTS metadata (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            );
+        ''')
+
+        # Add columns missing from stores created by older versions
+        existing_columns = [row[1] for row in self.connection.execute('PRAGMA table_info(videos)')]
+        if 'classifier_version' not in existing_columns:
+            self.connection.execute('ALTER TABLE videos ADD COLUMN classifier_version TEXT')
+        self.connection.execute('CREATE INDEX IF NOT EXISTS videos_classifier_version ON videos (classifier_version)')
+        self.connection.commit()
+
+    def close(self):
+        '''Closes connection to SQLite file.'''
+        self.connection.close()
+
+    def upsert_videos(self, videos_data, playlist_item_etags = None, batch_size = 1000):
+        '''
+        Inserts videos or updates videos that are already stored, in batches.
+        Classifier version of updated videos is cleared if title or description changed, so they are classified again.
+
+        Parameters:
+            videos_data (iterable): Video data from YouTube Data API videos list method
+            playlist_item_etags (dict|None): Playlist item ETag keyed by video ID (optional)
+            batch_size (int): Number of videos written per batch
+
+        Returns:
+            int: Number of videos inserted or updated
+        '''
+        playlist_item_etags = playlist_item_etags or {}
+        count = 0
+        batch = []
+
+        def write_batch():
+            with self.connection:
+                self.connection.executemany('''
+                    INSERT INTO videos (video_id, published_at, title, description, channel_id, playlist_item_etag, data)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (video_id) DO UPDATE SET
+                        published_at = excluded.published_at,
+                        title = excluded.title,
+                        description = excluded.description,
+                        channel_id = excluded.channel_id,
+                        classifier_version = CASE
+                            WHEN videos.title = excluded.title AND videos.description = excluded.description THEN videos.classifier_version
+                            ELSE NULL
+                        END,
+                        playlist_item_etag = COALESCE(excluded.playlist_item_etag, videos.playlist_item_etag),
+                        data = excluded.data
+                ''', batch)
+
+        for video_data in videos_data:
+            snippet = video_data.get('snippet', {})
+            batch.append((
+                video_data['id'],
+                snippet.get('publishedAt'),
+                snippet.get('title', ''),
+                snippet.get('description', ''),
+                snippet.get('channelId'),
+                playlist_item_etags.get(video_data['id']),
+                json.dumps(video_data, separators=(',', ':')),
+            ))
+            if len(batch) >= batch_size:
+                write_batch()
+                count += len(batch)
+                batch = []
+
+        if batch:
+            write_batch()
+            count += len(batch)
+
+        return count
+
+    def set_shows(self, video_shows):
+        '''
+        Sets classified show of each video and version of classifier used.
+
+        Parameters:
+            video_shows (iterable): Tuples of (<video_id(str)>, <show_title(str)>, <classifier_version(str)>)
+        '''
+        with self.connection:
+            self.connection.executemany(
+                'UPDATE videos SET show = ?, classifier_version = ? WHERE video_id = ?',
+                ((show_title, classifier_version, video_id) for video_id, show_title, classifier_version in video_shows)
+            )
+
+    def get_videos(self, columns = ('video_id', 'title'), show = None, published_after = None, published_before = None, video_ids = None, exclude_classifier_versions = None, newest_first = True, limit = None):
+        '''
+        Yields stored videos with only the requested columns.
+
+        Parameters:
+            columns (tuple): Columns to return (see VideoStore.COLUMNS)
+            show (str|None): Only videos classified as show title (optional)
+            published_after (str|None): Only videos published at or after ISO 8601 date (optional)
+            published_before (str|None): Only videos published before ISO 8601 date (optional)
+            video_ids (iterable|None): Only videos with these video IDs (optional)
+            exclude_classifier_versions (iterable|None): Only videos NOT classified or classified with a version NOT in this list (optional)
+            newest_first (bool): If True, sorts by publish date newest first, else oldest first
+            limit (int|None): Max number of videos (optional)
+
+        Yields:
+            dict: Requested columns of each video ('data' column is converted from JSON)
+        '''
+        for column in columns:
+            if column not in VideoStore.COLUMNS:
+                raise ValueError(f'Unknown video store column: {column}')
+
+        conditions = []
+        params = []
+        if show is not None:
+            conditions.append('show = ?')
+            params.append(show)
+        if published_after is not None:
+            conditions.append('published_at >= ?')
+            params.append(published_after)
+        if published_before is not None:
+            conditions.append('published_at < ?')
+            params.append(published_before)
+        # Lists are passed as a single JSON array parameter, since SQLite limits the number of parameters of a query
+        if video_ids is not None:
+            conditions.append('video_id IN (SELECT value FROM json_each(?))')
+            params.append(json.dumps(list(video_ids)))
+        if exclude_classifier_versions is not None:
+            conditions.append('(classifier_version IS NULL OR classifier_version NOT IN (SELECT value FROM json_each(?)))')
+            params.append(json.dumps(list(exclude_classifier_versions)))
+
+        query = f'SELECT {", ".join(columns)} FROM videos'
+        if conditions:
+            query += ' WHERE ' + ' AND '.join(conditions)
+        query += f' ORDER BY published_at {"DESC" if newest_first else "ASC"}'
+        if limit is not None:
+            query += ' LIMIT ?'
+            params.append(limit)
+
+        for row in self.connection.execute(query, params):
+            video = dict(zip(columns, row))
+            if 'data' in video:
+                video['data'] = json.loads(video['data'])
+            yield video
+
+    def get_video(self, video_id, columns = COLUMNS):
+        '''
+        Returns stored video with only the requested columns.
+
+        Parameters:
+            video_id (str): YouTube video ID
+            columns (tuple): Columns to return (see VideoStore.COLUMNS)
+
+        Returns:
+            dict|None: Requested columns of video or None if video is NOT stored
+        '''
+        return next(self.get_videos(columns, video_ids=[video_id]), None)
+
+    def count(self, show = None):
+        '''
+        Returns number of stored videos.
+
+        Parameters:
+            show (str|None): Only count videos classified as show title (optional)
+
+        Returns:
+            int: Number of videos
+        '''
+        if show is None:
+            return self.connection.execute('SELECT COUNT(*) FROM videos').fetchone()[0]
+        return self.connection.execute('SELECT COUNT(*) FROM videos WHERE show = ?', (show,)).fetchone()[0]
+
+    def get_metadata(self, key, default = None):
+        '''
+        Returns stored metadata value (ex. ETag of playlist from previous sync).
+
+        Parameters:
+            key (str): Metadata key
+            default: Value returned if key is NOT stored
+
+        Returns:
+            str|None: Metadata value
+        '''
+        row = self.connection.execute('SELECT value FROM metadata WHERE key = ?', (key,)).fetchone()
+        return row[0] if row is not None else default
+
+    def set_metadata(self, key, value):
+        '''
+        Stores metadata value.
+
+        Parameters:
+            key (str): Metadata key
+            value (str|None): Metadata value
+        '''
+        with self.connection:
+            self.connection.execute('INSERT OR REPLACE INTO metadata (key, value) VALUES (?, ?)', (key, value))
@@ -1,47 +1,293 @@
-from googleapiclient.discovery import build
+from concurrent.futures import ThreadPoolExecutor
 from decouple import config
+from json_lines import write_json_lines
 import pprint
-import json
+import os
+import threading
+import time
+import bisect
+import itertools
+import collections
+
+class RequestStats:
+    '''Thread-safe counters of quota units, latency, pages and bytes received for each YouTube Data API method.'''
+
+    # Quota units charged for each request of YouTube Data API method
+    QUOTA_COSTS = {
+        'videos.list': 1,
+        'playlistItems.list': 1,
+    }
+
+    # Upper bounds (seconds) of latency histogram buckets (last bucket counts anything slower)
+    LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+
+    def __init__(self):
+        '''Constructor for RequestStats class.'''
+        self.lock = threading.Lock()
+        self.method_stats = {}
+
+    def record(self, method_name, latency, bytes_received, num_items, is_error = False):
+        '''
+        Records stats for a single request.
+
+        Parameters:
+            method_name (str): YouTube Data API method (ex. 'videos.list')
+            latency (float): Seconds request took to execute
+            bytes_received (int): Size of response body in bytes
+            num_items (int): Number of items in response
+            is_error (bool): True if request failed
+        '''
+        with self.lock:
+            if method_name not in self.method_stats:
+                self.method_stats[method_name] = {
+                    'requests': 0,
+                    'errors': 0,
+                    'quota_units': 0,
+                    'items': 0,
+                    'bytes_received': 0,
+                    'total_latency': 0.0,
+                    'max_latency': 0.0,
+                    'latency_histogram': [0] * (len(RequestStats.LATENCY_BUCKETS) + 1),
+                }
+            stats = self.method_stats[method_name]
+            stats['requests'] += 1
+            stats['errors'] += 1 if is_error else 0
+            stats['quota_units'] += RequestStats.QUOTA_COSTS.get(method_name, 1)
+            stats['items'] += num_items
+            stats['bytes_received'] += bytes_received
+            stats['total_latency'] += latency
+            stats['max_latency'] = max(stats['max_latency'], latency)
+            stats['latency_histogram'][bisect.bisect_left(RequestStats.LATENCY_BUCKETS, latency)] += 1
+
+    def get_snapshot(self):
+        '''
+        Returns copy of stats for each method.
+
+        Returns:
+            dict: Stats keyed by method name, with 'total' key for totals of quota units, requests and bytes received
+        '''
+        with self.lock:
+            snapshot = {
+                method_name: dict(stats, latency_histogram=list(stats['latency_histogram']))
+                for method_name, stats in self.method_stats.items()
+            }
+        snapshot['total'] = {
+            key: sum(stats[key] for stats in snapshot.values())
+            for key in ('requests', 'errors', 'quota_units', 'items', 'bytes_received')
+        }
+        return snapshot
+
+    def get_report(self):
+        '''
+        Returns readable report of stats for each method.
+
+        Returns:
+            str: Report with one line per method and latency histogram
+        '''
+        snapshot = self.get_snapshot()
+        bucket_labels = [f'<={bucket}s' for bucket in RequestStats.LATENCY_BUCKETS] + [f'>{RequestStats.LATENCY_BUCKETS[-1]}s']
+        lines = []
+        for method_name, stats in snapshot.items():
+            if method_name == 'total':
+                continue
+            average_latency = stats['total_latency'] / stats['requests'] if stats['requests'] else 0.0
+            lines.append(
+                f"{method_name}: {stats['requests']} pages, {stats['errors']} errors, {stats['quota_units']} quota units, "
+                f"{stats['items']} items, {stats['bytes_received']} bytes, "
+                f"avg {average_latency:.3f}s, max {stats['max_latency']:.3f}s"
+            )
+            lines.append('    ' + ', '.join(
+                f'{label}: {count}' for label, count in zip(bucket_labels, stats['latency_histogram'])
+            ))
+        total = snapshot['total']
+        lines.append(f"Total: {total['requests']} pages, {total['quota_units']} quota units, {total['bytes_received']} bytes")
+        return '\n'.join(lines)
+
+    def reset(self):
+        '''Removes all recorded stats.'''
+        with self.lock:
+            self.method_stats = {}
 
 class YouTube:
     '''Class to make requests using YouTube Data API.'''
 
-    # Static property for YouTube Resource Object used to make requests
-    youtube_object = None
+    # Static property for YouTube Resource Objects used to make requests, keyed by discovery document path and HTTP object they were built with
+    youtube_objects = {}
+    youtube_objects_lock = threading.Lock()
 
-    def __init__(self):
-        '''Constructor for YouTube class.'''
-        if YouTube.youtube_object is not None:
-            return
+    # Static property for googleapiclient package, imported on first use since it is slow to import
+    googleapiclient = None
+
+    # Static property for HTTP object of each thread (httplib2 is NOT thread-safe)
+    thread_local = threading.local()
+
+    # Static property for quota and latency stats of requests made by all instances
+    request_stats = RequestStats()
+
+    def __init__(self, discovery_document_path = None, http = None):
+        '''
+        Constructor for YouTube class.
+
+        Parameters:
+            discovery_document_path (str|None): Path of cached discovery document used to build YouTube Resource Object. If file does NOT exist, it is created from the discovery document bundled with googleapiclient.
+            http (httplib2.Http|None): HTTP object used to make requests (ex. googleapiclient.http.HttpMock to use a stubbed transport offline)
+
+        Notes:
+        - googleapiclient is NOT imported and the YouTube Resource Object is NOT built until the first request.
+        - Instances with the same discovery document path and HTTP object share one YouTube Resource Object.
+        '''
+        self.discovery_document_path = discovery_document_path
+        self.http = http
+        self.youtube_object = None
+
+    @staticmethod
+    def get_googleapiclient():
+        '''
+        Returns googleapiclient package, importing the modules used by this class on first use.
+
+        Returns:
+            module: googleapiclient package (with discovery, discovery_cache, errors and http modules loaded)
+        '''
+        if YouTube.googleapiclient is None:
+            import googleapiclient.discovery
+            import googleapiclient.discovery_cache
+            import googleapiclient.errors
+            import googleapiclient.http
+            YouTube.googleapiclient = googleapiclient
+        return YouTube.googleapiclient
+
+    def get_youtube_object(self):
+        '''
+        Returns YouTube Resource Object used to make requests, building it on first use.
+
+        Returns:
+            googleapiclient.discovery.Resource: YouTube Resource Object built with discovery document path and HTTP object of instance
+        '''
+        if self.youtube_object is None:
+            # Lock so threads using new instances at the same time do NOT build the same object twice
+            with YouTube.youtube_objects_lock:
+                key = (self.discovery_document_path, self.http)
+                if key not in YouTube.youtube_objects:
+                    YouTube.youtube_objects[key] = YouTube.build_youtube_object(self.discovery_document_path, self.http)
+                self.youtube_object = YouTube.youtube_objects[key]
+        return self.youtube_object
+
+    @staticmethod
+    def build_youtube_object(discovery_document_path = None, http = None):
+        '''
+        Builds YouTube Resource Object, using cached discovery document if available.
+
+        Parameters:
+            discovery_document_path (str|None): Path of cached discovery document
+            http (httplib2.Http|None): HTTP object used to make requests
+
+        Returns:
+            googleapiclient.discovery.Resource: YouTube Resource Object
+        '''
+        googleapiclient = YouTube.get_googleapiclient()
 
         # Arguments that need to passed to the build function 
         DEVELOPER_KEY = config('YOUTUBE_DEVELOPER_KEY')
         YOUTUBE_API_SERVICE_NAME = 'youtube'
         YOUTUBE_API_VERSION = 'v3'
-    
+
+        discovery_document = None
+        if discovery_document_path is not None:
+            if os.path.exists(discovery_document_path):
+                with open(discovery_document_path, 'r') as infile:
+                    discovery_document = infile.read()
+            else:
+                discovery_document = googleapiclient.discovery_cache.get_static_doc(YOUTUBE_API_SERVICE_NAME, YOUTUBE_API_VERSION)
+                if discovery_document is not None:
+                    with open(discovery_document_path, 'w') as outfile:
+                        outfile.write(discovery_document)
+
         # Create Youtube Resource Object 
-        YouTube.youtube_object = build(
+        if discovery_document is not None:
+            return googleapiclient.discovery.build_from_document(
+                discovery_document,
+                developerKey = DEVELOPER_KEY,
+                http = http
+            )
+
+        return googleapiclient.discovery.build(
             YOUTUBE_API_SERVICE_NAME, 
             YOUTUBE_API_VERSION,
-            developerKey = DEVELOPER_KEY
+            developerKey = DEVELOPER_KEY,
+            http = http
+        )
+
+    @staticmethod
+    def get_thread_http():
+        '''
+        Returns HTTP object for the current thread, creating it if needed.
+
+        Returns:
+            httplib2.Http: HTTP object used to execute requests in the current thread.
+        '''
+        if not hasattr(YouTube.thread_local, 'http'):
+            YouTube.thread_local.http = YouTube.get_googleapiclient().http.build_http()
+        return YouTube.thread_local.http
+
+    def execute_request(self, method_name, request, http = None):
+        '''
+        Executes request and records its quota units, latency, items and bytes received in request_stats.
+
+        Parameters:
+            method_name (str): YouTube Data API method of request (ex. 'videos.list')
+            request (googleapiclient.http.HttpRequest): Request to execute
+            http (httplib2.Http|None): HTTP object used to execute request (uses YouTube Resource Object's if None)
+
+        Returns:
+            dict: Response from YouTube Data API request
+        '''
+        # Wrap response parser to get size of response body
+        bytes_received = [0]
+        postproc = request.postproc
+        def postproc_with_size(resp, content):
+            bytes_received[0] = len(content)
+            return postproc(resp, content)
+        request.postproc = postproc_with_size
+
+        start = time.perf_counter()
+        try:
+            response = request.execute(http=http)
+        except YouTube.get_googleapiclient().errors.HttpError as error:
+            # Not modified responses (status 304) are NOT counted as errors
+            YouTube.request_stats.record(
+                method_name,
+                time.perf_counter() - start,
+                len(error.content or b''),
+                0,
+                error.resp.status != 304
+            )
+            raise
+
+        YouTube.request_stats.record(
+            method_name,
+            time.perf_counter() - start,
+            bytes_received[0],
+            len(response.get('items', [])) if response else 0
         )
-    
-    def get_youtube_video_data(self, video_id, param = 'contentDetails,id,snippet,statistics'):
+        return response
+
+    def get_youtube_video_data(self, video_id, param = 'contentDetails,id,snippet,statistics', http = None):
         '''
         Returns data on video from YouTube Data API.
 
         Param:
             video_id (str): YouTube video ID
             param (str): Parameters returned from YouTube Data API request
+            http (httplib2.Http|None): HTTP object used to execute request (uses YouTube Resource Object's if None)
 
         Return:
             list|None: Response from YouTube Data API request
         '''
-        request = YouTube.youtube_object.videos().list(
+        request = self.get_youtube_object().videos().list(
             part=param,
             id=video_id
         )
-        response = request.execute()
+        response = self.execute_request('videos.list', request, http)
 
         if response['items']:
             return response['items']
@@ -49,7 +295,7 @@ class YouTube:
             print(f'Could NOT get data from YouTube video ID: {video_id}')
             return None
 
-    def request_video_data_from_playlist(self, playlist_id, param = 'contentDetails,id,snippet', max_results = 50, next_page_token = None):
+    def request_video_data_from_playlist(self, playlist_id, param = 'contentDetails,id,snippet', max_results = 50, next_page_token = None, etag = None):
         '''
         Returns data from single request of playlist using YouTube Data API.
 
@@ -58,17 +304,27 @@ class YouTube:
             param (str): Parameters returned from YouTube Data API request
             max_results (number): Max results returned per page of request
             next_page_token (str): YouTube Data API token for next page of request
+            etag (str): ETag of previous response for the same page. If page has NOT changed, returns dict with only 'etag' and 'notModified' keys.
 
         Returns:
             dict|None: Response from the request to the YouTube Data API playlistItems list method 
         '''
-        request = YouTube.youtube_object.playlistItems().list(
+        request = self.get_youtube_object().playlistItems().list(
             part=param,
             playlistId=playlist_id,
             maxResults=max_results,
             pageToken=next_page_token
         )
-        response = request.execute()
+
+        # Conditional request returns status 304 if page has NOT changed since etag
+        if etag is not None:
+            request.headers['If-None-Match'] = etag
+        try:
+            response = self.execute_request('playlistItems.list', request)
+        except YouTube.get_googleapiclient().errors.HttpError as error:
+            if etag is not None and error.resp.status == 304:
+                return {'etag': etag, 'notModified': True}
+            raise
 
         if response:
             return response
@@ -76,6 +332,36 @@ class YouTube:
             print(f'Could NOT get data from YouTube playlist ID: {playlist_id}')
             return None
 
+    def iterate_video_data_from_playlist(self, playlist_id, param = 'contentDetails,id,snippet'):
+        '''
+        Yields data of each video in playlist using YouTube Data API, requesting one page at a time.
+
+        Parameters:
+            playlist_id (str): YouTube playlist ID
+            param (str): Parameters returned from YouTube Data API request
+
+        Yields:
+            dict: Data for each video in playlist
+        '''
+        next_page_token = None
+
+        while True:
+            # Make request
+            playlist_items_response = self.request_video_data_from_playlist(playlist_id, param, 50, next_page_token)
+            if not playlist_items_response:
+                return
+
+            # Yield items of page if response is valid
+            if 'items' in playlist_items_response:
+                yield from playlist_items_response['items']
+
+            # Stop if no more results (no 'nextPageToken' key in response dict)
+            if 'nextPageToken' not in playlist_items_response:
+                return
+
+            # Assign new next_page_token for next loop
+            next_page_token = playlist_items_response['nextPageToken']
+
     def get_all_video_data_from_playlist(self, playlist_id, param = 'contentDetails,id,snippet'):
         '''
         Returns data from all videos in playlist using YouTube Data API.
@@ -87,60 +373,137 @@ class YouTube:
         Returns:
             list: List of data for each video in playlist
         '''
+        return list(self.iterate_video_data_from_playlist(playlist_id, param))
+
+    def get_new_video_data_from_playlist(self, playlist_id, known_item_etags, playlist_etag = None, param = 'contentDetails,id,snippet'):
+        '''
+        Returns data for new or changed videos in playlist using YouTube Data API, stopping once a page of only known videos is reached.
+
+        Parameters:
+            playlist_id (str): YouTube playlist ID (newest videos first, ex. uploads playlist)
+            known_item_etags (dict): Playlist item ETag of each stored video, keyed by video ID from contentDetails.videoId, NOT playlist item ID (ETag can be None if unknown)
+            playlist_etag (str): ETag of first page of playlist from the previous sync
+            param (str): Parameters returned from YouTube Data API request (must include contentDetails)
+
+        Returns:
+            tuple: (<list of data for each new or changed video in playlist>, <ETag of first page of playlist>)
+
+        Notes:
+        - If first page of playlist has NOT changed since playlist_etag, returns no videos after a single request.
+        - Paging stops after the first page where every video ID is known, so new videos on a page with known videos (ex. scheduled videos made public later) are NOT missed.
+        '''
         playlist_items = []
         next_page_token = None
+        first_page_etag = None
 
         while True:
-            # Make request
-            playlist_items_response = self.request_video_data_from_playlist(playlist_id, param, 50, next_page_token)
+            playlist_items_response = self.request_video_data_from_playlist(
+                playlist_id,
+                param,
+                50,
+                next_page_token,
+                playlist_etag if next_page_token is None else None
+            )
+            if not playlist_items_response:
+                break
 
-            # Add items to list if response is valid
-            if (playlist_items_response and 'items' in playlist_items_response and len(playlist_items_response['items']) > 0):
-                playlist_items += playlist_items_response['items']
+            if first_page_etag is None:
+                first_page_etag = playlist_items_response.get('etag')
+                if playlist_items_response.get('notModified'):
+                    break
 
-            # Break out of while loop if no more results (no 'nextPageToken' key in response dict)
-            if 'nextPageToken' not in playlist_items_response:
+            found_new_video = False
+            for playlist_item in playlist_items_response.get('items', []):
+                video_id = playlist_item['contentDetails']['videoId']
+                if video_id not in known_item_etags:
+                    playlist_items.append(playlist_item)
+                    found_new_video = True
+                # Known video is changed if its ETag is known and different
+                elif known_item_etags[video_id] is not None and known_item_etags[video_id] != playlist_item['etag']:
+                    playlist_items.append(playlist_item)
+
+            if not found_new_video or 'nextPageToken' not in playlist_items_response:
                 break
 
-            # Assign new next_page_token for next loop
             next_page_token = playlist_items_response['nextPageToken']
 
-        return playlist_items
+        return playlist_items, first_page_etag
 
-    def get_video_data_from_video_id_list(self, video_id_list, param = 'contentDetails,id,snippet,statistics'):
+    def iterate_video_data_from_video_id_list(self, video_ids, param = 'contentDetails,id,snippet,statistics', max_workers = 1):
+        '''
+        Yields data for each video ID using YouTube Data API, consuming video IDs 50 at a time.
+
+        Parameters:
+            video_ids (iterable): YouTube video IDs (ex. generator)
+            param (str): Parameters returned from YouTube Data API request
+            max_workers (int): Number of requests of 50 video IDs made at the same time
+
+        Yields:
+            dict: Response data from API for each video ID, in the same order as video_ids
+        '''
+        video_ids = iter(video_ids)
+
+        def get_next_video_ids_string():
+            # Returns string of next 50 video IDs (max IDs per request) or None if no IDs left
+            video_ids_chunk = list(itertools.islice(video_ids, 50))
+            return ','.join(video_ids_chunk) if video_ids_chunk else None
+
+        if max_workers <= 1:
+            while True:
+                video_ids_string = get_next_video_ids_string()
+                if video_ids_string is None:
+                    return
+                video_data_response = self.get_youtube_video_data(video_ids_string, param)
+                if video_data_response:
+                    yield from video_data_response
+
+        # Keep at most max_workers requests open, yielding responses in the same order as requested.
+        # Each thread uses its own HTTP object.
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = collections.deque()
+            while True:
+                while len(futures) < max_workers:
+                    video_ids_string = get_next_video_ids_string()
+                    if video_ids_string is None:
+                        break
+                    futures.append(executor.submit(
+                        lambda video_ids_string: self.get_youtube_video_data(video_ids_string, param, self.http if self.http is not None else YouTube.get_thread_http()),
+                        video_ids_string
+                    ))
+
+                if not futures:
+                    return
+
+                video_data_response = futures.popleft().result()
+                if video_data_response:
+                    yield from video_data_response
+
+    def get_video_data_from_video_id_list(self, video_id_list, param = 'contentDetails,id,snippet,statistics', max_workers = 1):
         '''
         Returns data for each video ID using YouTube Data API.
 
         Parameters:
             video_id_list (str[]): List of YouTube video IDs
             param (str): Parameters returned from YouTube Data API request
+            max_workers (int): Number of requests of 50 video IDs made at the same time
 
         Returns:
-            list: response data from API for each video ID
-        '''
-        video_data_list = []
-        index = 0
-        list_length = len(video_id_list)
-        while index < list_length:
-            video_ids_string = ','.join(video_id_list[index:(index + 50)])
-            video_data_response = self.get_youtube_video_data(video_ids_string)
-            if len(video_data_response) > 0:
-                video_data_list += video_data_response
-            # Increment index by 50 for next loop
-            index += 50
-        return video_data_list
+            list: response data from API for each video ID, in the same order as video_id_list
+        '''
+        return list(self.iterate_video_data_from_video_id_list(video_id_list, param, max_workers))
 
 def main():
     youtube_inst = YouTube()
 
     # Game Informer Uploads Playlist ID: UUK-65DO2oOxxMwphl2tYtcw
-    playlist_video_data = youtube_inst.get_all_video_data_from_playlist('UUK-65DO2oOxxMwphl2tYtcw', param='contentDetails')
-
-    video_id_list = list(map(lambda playlist_item: playlist_item['contentDetails']['videoId'], playlist_video_data))
-    video_data = youtube_inst.get_video_data_from_video_id_list(video_id_list)
+    # Pipeline of generators writes each video as it arrives, so memory stays flat for any size of channel
+    playlist_items = youtube_inst.iterate_video_data_from_playlist('UUK-65DO2oOxxMwphl2tYtcw', param='contentDetails')
+    video_ids = (playlist_item['contentDetails']['videoId'] for playlist_item in playlist_items)
+    video_data = youtube_inst.iterate_video_data_from_video_id_list(video_ids, max_workers=8)
 
-    with open('utilities/gi_youtube_video_data.json', 'w') as outfile:
-            json.dump(video_data, outfile, indent=2)
+    num_videos = write_json_lines(video_data, 'utilities/gi_youtube_video_data.ndjson')
+    print(f'Videos Written: {num_videos}')
+    print(YouTube.request_stats.get_report())
 
 if __name__ == "__main__":
     main()
\ No newline at end of file